@@ -12,6 +12,7 @@ from sqlmodel import SQLModel
 from shared.config import settings
 from app.users.infrastructure.user_model import *
 from app.roles.infrastructure.role_model import *
+from shared.versioning import DataVersionModel
 
 target_metadata = SQLModel.metadata
 
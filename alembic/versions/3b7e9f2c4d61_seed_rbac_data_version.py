@@ -0,0 +1,29 @@
+"""seed rbac data version
+
+Revision ID: 3b7e9f2c4d61
+Revises: 8c3d1e5b7a20
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e9f2c4d61'
+down_revision: Union[str, Sequence[str], None] = '8c3d1e5b7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    data_versions = sa.table('data_versions', sa.column('name', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(data_versions, [{'name': 'rbac', 'version': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM data_versions WHERE name = 'rbac'")
@@ -1,9 +1,32 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from shared.admission import render_admission_metrics
+from shared.config import settings
+from shared.database import dispose_engines
+from shared.db_pool import render_engine_metrics
+from shared.metrics import request_metrics
+from shared.security.password_hasher import password_hasher
 from app.users.presentation.user_routes import router as user_router
 from app.roles.presentation.role.role_routes import router as role_router
 from app.roles.presentation.permission.permission_routes import router as permission_router
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Calibración opcional (BCRYPT_ROUNDS=0): propia de este proceso, ver Settings
+    if not settings.BCRYPT_ROUNDS:
+        rounds = await password_hasher.calibrate(
+            settings.BCRYPT_TARGET_MS / 1000, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS
+        )
+        logger.info("Costo bcrypt calibrado: %d (objetivo %.0f ms)", rounds, settings.BCRYPT_TARGET_MS)
+    yield
+    await dispose_engines()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(user_router)
 app.include_router(role_router)
@@ -12,3 +35,9 @@ app.include_router(permission_router)
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        lines = request_metrics.render() + render_engine_metrics() + render_admission_metrics()
+        return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
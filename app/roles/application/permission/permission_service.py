@@ -1,4 +1,7 @@
 from shared.base import BaseUseCaseHandler
+from shared.database import simple_session
+from shared.security.permission_registry import permission_registry
+from ..role.roles_catalog import roles_catalog
 
 from ...infrastructure.permission.permission_repository import PermissionRepositoryImpl
 
@@ -13,25 +16,22 @@ from fastapi import Request
 class PermissionService(BaseUseCaseHandler):
     
     async def get_all(self, request: Request):
-        repo = PermissionRepositoryImpl(self.session)
-        all_permissions = repo.get_all()
-        permissions = []
-        for p in all_permissions:
-            permissions.append({
-                "id": p.id,
-                "name": p.name,
-                "description": p.description
-            })
-        return self.return_json(est=True, ico="success", msg="Permisos obtenidos correctamente", data=permissions)
+        catalog = await roles_catalog.get()
+        return self.return_json(
+            est=True, ico="success", msg="Permisos obtenidos correctamente",
+            data=catalog.permissions_data, cache_key=("permissions", catalog.digest)
+        )
 
     async def create_permission(self, request: Request):
         body: CreatePermissionSchema = request.state.body
         repo = PermissionRepositoryImpl(self.session)
         domain_service = PermissionDomainService(repo)
         try:
-            permission = domain_service.create_permission(Permission(name=body.name, description=body.description))
+            permission = await domain_service.create_permission(Permission(name=body.name, description=body.description))
         except CustomException as e:
             return self.return_json(est=False, ico="warning", msg=str(e), status_code=409)
+        permission_registry.register(permission.name, permission.id)
+        roles_catalog.invalidate()
 
         return self.return_json(
             est=True, ico="success", 
@@ -42,4 +42,13 @@ class PermissionService(BaseUseCaseHandler):
             }
         )
 
-    
\ No newline at end of file
+
+async def load_permission_registry():
+    """
+    Loader del registro de bits de permisos (ver `shared.security.permission_registry`).
+    """
+    # Primario: un permiso recién creado debe tener bit aunque la réplica vaya atrasada
+    async with simple_session(use_primary=True) as session:
+        return [(p.name, p.id) for p in await PermissionRepositoryImpl(session).get_all()]
+
+permission_registry.set_loader(load_permission_registry)
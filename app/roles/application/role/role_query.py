@@ -1,13 +1,19 @@
+from typing import Union
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.database import maybe_await
 from .role_dtos import RoleWithPermissionsDTO
 from ...infrastructure.role_model import Role as RoleModel
 
 class GetRolesWithPermissionsQuery:
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
         
-    def execute(self) -> list[RoleWithPermissionsDTO]:
-        roles = self.session.exec(select(RoleModel)).all()
+    async def execute(self) -> list[RoleWithPermissionsDTO]:
+        # Carga ansiosa: AsyncSession no permite lazy loading de relaciones
+        stmt = select(RoleModel).options(selectinload(RoleModel.permissions))
+        roles = (await maybe_await(self.session.exec(stmt))).all()
         result = []
 
         for role in roles:
@@ -20,4 +26,4 @@ class GetRolesWithPermissionsQuery:
                 )
             )
 
-        return result
\ No newline at end of file
+        return result
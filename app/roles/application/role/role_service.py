@@ -1,5 +1,7 @@
 from app.roles.infrastructure.permission.permission_repository import PermissionRepositoryImpl
 from app.users.infrastructure.user_repository import UserRepositoryImpl
+from app.users.application.user_permissions_cache import user_permissions_cache
+from app.users.application.users_version import users_version
 from shared.base import *
 
 from ...domain.role.role import Role, UserRole, RolePermission
@@ -9,28 +11,18 @@ from ...domain.exceptions import CustomException
 from ...infrastructure.role.role_repository import RoleRepositoryImpl, UserRoleRepositoryImpl, RolePermissionRepositoryImpl
 from ...presentation.role.schemas import *
 
-from .role_query import GetRolesWithPermissionsQuery
+from .roles_catalog import roles_catalog
 
 from fastapi import Request
 
 class RoleService(BaseUseCaseHandler):
     
     async def get_all(self, request: Request):
-        all_roles = GetRolesWithPermissionsQuery(self.session).execute()
-        roles = []
-        for r in all_roles:
-            roles.append({
-                "id": r.id,
-                "name": r.name,
-                "description": r.description,
-                "permissions_id": [p.id for p in r.permissions],
-                "permissions": [{
-                    "id": p.id,
-                    "name": p.name,
-                    "description": p.description
-                } for p in r.permissions]
-            })
-        return self.return_json(est=True, ico="success", msg="Roles obtenidos correctamente", data=roles)
+        catalog = await roles_catalog.get()
+        return self.return_json(
+            est=True, ico="success", msg="Roles obtenidos correctamente",
+            data=catalog.roles_data, cache_key=("roles", catalog.digest)
+        )
     
     async def create_role(self, request: Request):
         body: CreateRoleSchema = request.state.body
@@ -38,9 +30,10 @@ class RoleService(BaseUseCaseHandler):
         repo = RoleRepositoryImpl(self.session)
         domain_service = RoleDomainService(repo)
         try:
-            role = domain_service.create_role(Role(name=body.name, description=body.description))
+            role = await domain_service.create_role(Role(name=body.name, description=body.description))
         except CustomException as e:
             return self.return_json(est=False, ico="warning", msg=str(e), status_code=409)
+        roles_catalog.invalidate()
    
         return self.return_json(
             est=True, ico="success", 
@@ -63,23 +56,19 @@ class UserRoleService(BaseUseCaseHandler):
         
         domain_service = UserRoleDomainService(repo)
        
-        user = repo_user.get_by_id(body.user_id)
+        user = await repo_user.get_by_id(body.user_id)
         if not user:
             raise CustomException(f"El user con id {body.user_id} no existe")
        
-        for role_id in role_ids:            
-            role = repo_role.get_by_id(role_id)
-            if not role or not user:
-                raise CustomException(f"El rol con id {role_id} no existe")
+        found_ids = {role.id for role in await repo_role.get_by_ids(role_ids)}
+        missing_ids = sorted(set(role_ids) - found_ids)
+        if missing_ids:
+            raise CustomException(f"Los roles con id {', '.join(map(str, missing_ids))} no existen")
         
-        repo.delete_all_by_user_id(body.user_id)
-        for role_id in role_ids:
-            domain_service.add_user_role(
-                UserRole(
-                    user_id=body.user_id,
-                    role_id=role_id
-                )
-            )
+        diff = await domain_service.replace_user_roles(body.user_id, role_ids)
+        if diff.changed:
+            user_permissions_cache.invalidate_user(body.user_id)
+            await users_version.bump(self.session)
 
         return self.return_json(
             est=True,
@@ -99,23 +88,20 @@ class RolePermissionService(BaseUseCaseHandler):
         
         domain_service = RolePermissionDomainService(repo)
         
-        role = repo_role.get_by_id(body.role_id)
+        role = await repo_role.get_by_id(body.role_id)
         if not role:
             raise CustomException(f"El role con id {body.role_id} no existe")
         
-        for permission_id in permission_ids:            
-            permission = repo_permission.get_by_id(permission_id)
-            if not permission or not role:
-                raise CustomException(f"La permission con id {permission_id} no existe")
+        found_ids = {permission.id for permission in await repo_permission.get_by_ids(permission_ids)}
+        missing_ids = sorted(set(permission_ids) - found_ids)
+        if missing_ids:
+            raise CustomException(f"Los permisos con id {', '.join(map(str, missing_ids))} no existen")
         
-        repo.delete_all_by_role_id(body.role_id)
-        for permission_id in permission_ids:
-            domain_service.add_role_permission(
-                RolePermission(
-                    role_id=body.role_id,
-                    permission_id=permission_id
-                )
-            )
+        diff = await domain_service.replace_role_permissions(body.role_id, permission_ids)
+        if diff.changed:
+            user_permissions_cache.invalidate_role(body.role_id)
+            roles_catalog.invalidate()
+            await users_version.bump(self.session)
 
         return self.return_json(
             est=True,
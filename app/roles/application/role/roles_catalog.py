@@ -0,0 +1,154 @@
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import Request
+from sqlalchemy import null, select, union_all
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from shared.concurrency import LoopLock
+from shared.config import settings
+from shared.database import after_commit, maybe_await, simple_session
+from shared.serialization import json_dumps
+from .role_dtos import PermissionDTO, RoleWithPermissionsDTO
+from ...infrastructure.role_model import Permission, Role, RolePermission
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Catálogo materializado: roles con sus permisos, todos los permisos y
+    los payloads de `GET /roles/` y `GET /permissions/` ya construidos.
+    """
+    version: int
+    digest: str
+    roles: List[RoleWithPermissionsDTO]
+    permissions: List[PermissionDTO]
+    roles_data: List[Dict[str, Any]] = field(repr=False)
+    permissions_data: List[Dict[str, Any]] = field(repr=False)
+
+
+class RolesCatalog:
+    """
+    Catálogo de roles, permisos y aristas rol→permiso en memoria.
+    - Se carga con una sola consulta y queda sellado con `version`.
+    - `create_role`, `create_permission` y `add_permission_to_role` llaman a
+      `invalidate()`, que sube la versión al confirmar la transacción; la
+      siguiente lectura recarga.
+    - La invalidación es local al proceso; con varios workers `ttl_seconds`
+      acota cuánto tarda un cambio en verse en los demás (0 = sin caché).
+    - Se carga siempre del primario: una réplica atrasada guardaría datos
+      previos a la escritura bajo la versión nueva durante todo el TTL.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.version = 0
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._lock = LoopLock()
+
+    def bump(self) -> None:
+        self.version += 1
+
+    def invalidate(self) -> None:
+        after_commit(self.bump)
+
+    def _fresh(self) -> Optional[CatalogSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self.version:
+            return None
+        if time.monotonic() - self._loaded_at >= self.ttl_seconds:
+            return None
+        return snapshot
+
+    async def get(self) -> CatalogSnapshot:
+        snapshot = self._fresh()
+        if snapshot is not None:
+            return snapshot
+        async with self._lock.get():
+            snapshot = self._fresh()
+            if snapshot is None:
+                # Sellado con la versión previa a la consulta: si cambia mientras
+                # carga, la siguiente lectura vuelve a cargar
+                version = self.version
+                async with simple_session(use_primary=True) as session:
+                    snapshot = await self._load(session, version)
+                self._snapshot, self._loaded_at = snapshot, time.monotonic()
+            return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    @staticmethod
+    async def _load(session: Union[Session, AsyncSession], version: int) -> CatalogSnapshot:
+        # Aristas rol→permiso (roles sin permisos incluidos) + todos los permisos
+        edges = (
+            select(
+                Role.id.label("role_id"), Role.name.label("role_name"), Role.description.label("role_description"),
+                Permission.id.label("permission_id"), Permission.name.label("permission_name"),
+                Permission.description.label("permission_description"),
+            )
+            .select_from(Role)
+            .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+            .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        )
+        all_permissions = select(
+            null(), null(), null(), Permission.id, Permission.name, Permission.description
+        )
+        rows = (await maybe_await(session.execute(union_all(edges, all_permissions)))).all()
+
+        permissions: Dict[int, PermissionDTO] = {}
+        roles: Dict[int, RoleWithPermissionsDTO] = {}
+        for role_id, role_name, role_description, permission_id, permission_name, permission_description in rows:
+            permission = None
+            if permission_id is not None:
+                permission = permissions.get(permission_id)
+                if permission is None:
+                    permission = permissions[permission_id] = PermissionDTO(
+                        id=permission_id, name=permission_name, description=permission_description
+                    )
+            if role_id is not None:
+                role = roles.get(role_id)
+                if role is None:
+                    role = roles[role_id] = RoleWithPermissionsDTO(
+                        id=role_id, name=role_name, description=role_description, permissions=[]
+                    )
+                if permission is not None:
+                    role.permissions.append(permission)
+
+        ordered_roles = [roles[role_id] for role_id in sorted(roles)]
+        for role in ordered_roles:
+            role.permissions.sort(key=lambda p: p.id)
+        ordered_permissions = [permissions[permission_id] for permission_id in sorted(permissions)]
+
+        roles_data = [{
+            "id": r.id,
+            "name": r.name,
+            "description": r.description,
+            "permissions_id": [p.id for p in r.permissions],
+            "permissions": [{"id": p.id, "name": p.name, "description": p.description} for p in r.permissions]
+        } for r in ordered_roles]
+        permissions_data = [{"id": p.id, "name": p.name, "description": p.description} for p in ordered_permissions]
+
+        return CatalogSnapshot(
+            version=version,
+            # Hash del contenido: igual en todos los workers con los mismos datos
+            digest=hashlib.sha256(json_dumps([roles_data, permissions_data])).hexdigest()[:32],
+            roles=ordered_roles,
+            permissions=ordered_permissions,
+            roles_data=roles_data,
+            permissions_data=permissions_data,
+        )
+
+
+roles_catalog = RolesCatalog(ttl_seconds=settings.ROLES_CATALOG_TTL_SECONDS)
+
+
+async def catalog_etag(request: Request, **kwargs) -> str:
+    """
+    Versión para el ETag de GET /roles/ y GET /permissions/.
+    """
+    return (await roles_catalog.get()).digest
@@ -6,7 +6,7 @@ class PermissionDomainService:
     def __init__(self, repo: PermissionRepositoryDomain):
         self.repo = repo
     
-    def create_permission(self, permission: Permission) -> Permission:
-        if self.repo.get_by_name(permission.name):
+    async def create_permission(self, permission: Permission) -> Permission:
+        if await self.repo.get_by_name(permission.name):
             raise CustomException("El permiso ya existe")
-        return self.repo.save(permission)
\ No newline at end of file
+        return await self.repo.save(permission)
\ No newline at end of file
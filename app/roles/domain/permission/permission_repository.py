@@ -4,17 +4,21 @@ from .permission import Permission
 
 class PermissionRepositoryDomain(ABC):
     @abstractmethod
-    def get_by_name(self, name: str) -> Optional[Permission]:
+    async def get_by_name(self, name: str) -> Optional[Permission]:
         pass
     
     @abstractmethod
-    def get_all(self) -> list[Permission]:
+    async def get_all(self) -> list[Permission]:
         pass
     
     @abstractmethod
-    def save(self, permission: Permission) -> Permission:
+    async def save(self, permission: Permission) -> Permission:
         pass
     
     @abstractmethod
-    def get_by_id(self, permission_id: int) -> Optional[Permission]:
+    async def get_by_id(self, permission_id: int) -> Optional[Permission]:
+        pass
+
+    @abstractmethod
+    async def get_by_ids(self, permission_ids: list[int]) -> list[Permission]:
         pass
\ No newline at end of file
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 @dataclass
 class Role:
@@ -25,5 +25,13 @@ class RolePermission:
     permission_id: Optional[int] = None
     
     created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None    
+    updated_at: Optional[datetime] = None
+
+@dataclass
+class AssignmentDiff:
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
 
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
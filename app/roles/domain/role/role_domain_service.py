@@ -1,36 +1,42 @@
 
 from .role_repository import RoleRepositoryDomain, UserRoleRepositoryDomain, RolePermissionRepositoryDomain
-from .role import Role, UserRole, RolePermission
+from .role import Role, UserRole, RolePermission, AssignmentDiff
 from ..exceptions import CustomException
 
 class RoleDomainService:
     def __init__(self, repo: RoleRepositoryDomain):
         self.repo = repo
     
-    def create_role(self, role: Role) -> Role:
-        if self.repo.get_by_name(role.name):
+    async def create_role(self, role: Role) -> Role:
+        if await self.repo.get_by_name(role.name):
             raise CustomException("El role ya existe")
-        return self.repo.save(role)
+        return await self.repo.save(role)
 
 
 class UserRoleDomainService:
     def __init__(self, repo: UserRoleRepositoryDomain):
         self.repo = repo
     
-    def add_user_role(self, user_role: UserRole) -> UserRole:
-        existing = self.repo.get_by_role_user_id(user_role.role_id, user_role.user_id)
+    async def add_user_role(self, user_role: UserRole) -> UserRole:
+        existing = await self.repo.get_by_role_user_id(user_role.role_id, user_role.user_id)
         if existing:
             return existing
-        return self.repo.add_user_role(user_role)
+        return await self.repo.add_user_role(user_role)
+
+    async def replace_user_roles(self, user_id: int, role_ids: list[int]) -> AssignmentDiff:
+        return await self.repo.replace_user_roles(user_id, role_ids)
 
 
 class RolePermissionDomainService:
     def __init__(self, repo: RolePermissionRepositoryDomain):
         self.repo = repo
     
-    def add_role_permission(self, role_permission: RolePermission) -> RolePermission:
-        existing = self.repo.get_by_role_permission_id(role_permission.role_id, role_permission.permission_id)
+    async def add_role_permission(self, role_permission: RolePermission) -> RolePermission:
+        existing = await self.repo.get_by_role_permission_id(role_permission.role_id, role_permission.permission_id)
         if existing:
             return existing
-        return self.repo.add_role_permission(role_permission)
+        return await self.repo.add_role_permission(role_permission)
+
+    async def replace_role_permissions(self, role_id: int, permission_ids: list[int]) -> AssignmentDiff:
+        return await self.repo.replace_role_permissions(role_id, permission_ids)
         
\ No newline at end of file
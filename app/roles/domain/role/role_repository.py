@@ -1,48 +1,60 @@
 from abc import ABC, abstractmethod
 from typing import Optional
 
-from .role import Role, UserRole, RolePermission
+from .role import Role, UserRole, RolePermission, AssignmentDiff
 
 class RoleRepositoryDomain(ABC):
     @abstractmethod
-    def get_by_id(self, role_id: int) -> Optional[Role]:
+    async def get_by_id(self, role_id: int) -> Optional[Role]:
+        pass
+
+    @abstractmethod
+    async def get_by_ids(self, role_ids: list[int]) -> list[Role]:
         pass
     
     @abstractmethod
-    def save(self, role: Role) -> None:
+    async def save(self, role: Role) -> None:
         pass
 
     @abstractmethod
-    def get_all(self) -> list[Role]:
+    async def get_all(self) -> list[Role]:
         pass
     
     @abstractmethod
-    def get_by_name(self, name: str) -> Optional[Role]:
+    async def get_by_name(self, name: str) -> Optional[Role]:
         pass
 
 class UserRoleRepositoryDomain(ABC):
 
     @abstractmethod
-    def delete_all_by_user_id(self, user_id: int) -> None:
+    async def delete_all_by_user_id(self, user_id: int) -> None:
         pass
 
     @abstractmethod
-    def add_user_role(self, user_role: UserRole) -> UserRole:
+    async def add_user_role(self, user_role: UserRole) -> UserRole:
         pass
     
     @abstractmethod
-    def get_by_role_user_id(self, role_id: int, user_id: int) -> Optional[UserRole]:
+    async def get_by_role_user_id(self, role_id: int, user_id: int) -> Optional[UserRole]:
+        pass
+
+    @abstractmethod
+    async def replace_user_roles(self, user_id: int, role_ids: list[int]) -> AssignmentDiff:
         pass
 
 class RolePermissionRepositoryDomain(ABC):
     @abstractmethod
-    def delete_all_by_role_id(self, role_id: int) -> None:
+    async def delete_all_by_role_id(self, role_id: int) -> None:
         pass
     
     @abstractmethod
-    def add_role_permission(self, role_permission: RolePermission) -> RolePermission:
+    async def add_role_permission(self, role_permission: RolePermission) -> RolePermission:
+        pass
+
+    @abstractmethod
+    async def get_by_role_permission_id(self, role_id: int, permission_id: int) -> Optional[RolePermission]:
         pass
 
     @abstractmethod
-    def get_by_role_permission_id(self, role_id: int, permission_id: int) -> Optional[RolePermission]:
+    async def replace_role_permissions(self, role_id: int, permission_ids: list[int]) -> AssignmentDiff:
         pass
\ No newline at end of file
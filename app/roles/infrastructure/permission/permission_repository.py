@@ -1,31 +1,40 @@
 from dataclasses import asdict
-from typing import Optional
+from typing import Optional, Union
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from shared.database import maybe_await
 from ...domain.permission.permission import Permission
 from ...domain.permission.permission_repository import PermissionRepositoryDomain
 from ..role_model import Permission as PermissionModel
 
 class PermissionRepositoryImpl(PermissionRepositoryDomain):
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
 
     def _to_domain(self, db_permission: Optional[PermissionModel]) -> Optional[Permission]:
         return Permission(**db_permission.model_dump()) if db_permission else None
     
-    def get_by_id(self, permission_id: int) -> Optional[Permission]:
-        return self._to_domain(self.session.get(PermissionModel, permission_id))
+    async def get_by_id(self, permission_id: int) -> Optional[Permission]:
+        return self._to_domain(await maybe_await(self.session.get(PermissionModel, permission_id)))
+
+    async def get_by_ids(self, permission_ids: list[int]) -> list[Permission]:
+        if not permission_ids:
+            return []
+        stmt = select(PermissionModel).where(PermissionModel.id.in_(set(permission_ids)))
+        return [self._to_domain(permission) for permission in await maybe_await(self.session.exec(stmt))]
     
-    def get_by_name(self, name: str) -> Optional[Permission]:
+    async def get_by_name(self, name: str) -> Optional[Permission]:
         stmt = select(PermissionModel).where(PermissionModel.name == name)
-        return self._to_domain(self.session.exec(stmt).first())
+        return self._to_domain((await maybe_await(self.session.exec(stmt))).first())
     
-    def get_all(self) -> list[Permission]:
-        return [self._to_domain(permission) for permission in self.session.exec(select(PermissionModel))]
+    async def get_all(self) -> list[Permission]:
+        return [self._to_domain(permission) for permission in await maybe_await(self.session.exec(select(PermissionModel)))]
     
-    def save(self, permission: Permission) -> Permission:
+    async def save(self, permission: Permission) -> Permission:
         db_permission = PermissionModel(**asdict(permission))
         self.session.add(db_permission)
-        self.session.commit()
-        self.session.refresh(db_permission)
+        await maybe_await(self.session.commit())
+        await maybe_await(self.session.refresh(db_permission))
         return self._to_domain(db_permission)
+
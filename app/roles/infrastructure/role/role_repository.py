@@ -1,90 +1,170 @@
 from dataclasses import asdict
-from typing import Optional
+from typing import Optional, Union
+from sqlalchemy import delete, insert, update
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ...domain.role.role import Role, UserRole, RolePermission
+from shared.database import maybe_await
+from shared.utils import get_hora_peru
+from ...domain.role.role import Role, UserRole, RolePermission, AssignmentDiff
 from ...domain.role.role_repository import RoleRepositoryDomain, UserRoleRepositoryDomain, RolePermissionRepositoryDomain
 
 from ..role_model import Role as RoleModel
 from ..role_model import UserRole as UserRoleModel
 from ..role_model import RolePermission as RolePermissionModel
+from app.users.infrastructure.user_model import User as UserModel, role_permissions_version
 
 class RoleRepositoryImpl(RoleRepositoryDomain):
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
 
     def _to_domain(self, db_role: Optional[RoleModel]) -> Optional[Role]:
         return Role(**db_role.model_dump()) if db_role else None
 
-    def get_by_id(self, role_id: int) -> Optional[Role]:
-        return self._to_domain(self.session.get(RoleModel, role_id))
+    async def get_by_id(self, role_id: int) -> Optional[Role]:
+        return self._to_domain(await maybe_await(self.session.get(RoleModel, role_id)))
+
+    async def get_by_ids(self, role_ids: list[int]) -> list[Role]:
+        if not role_ids:
+            return []
+        stmt = select(RoleModel).where(RoleModel.id.in_(set(role_ids)))
+        return [self._to_domain(role) for role in await maybe_await(self.session.exec(stmt))]
     
-    def get_by_name(self, name: str) -> Optional[Role]:
+    async def get_by_name(self, name: str) -> Optional[Role]:
         stmt = select(RoleModel).where(RoleModel.name == name)
-        return self._to_domain(self.session.exec(stmt).first())
+        return self._to_domain((await maybe_await(self.session.exec(stmt))).first())
     
-    def get_all(self) -> list[Role]:
-        return [self._to_domain(role) for role in self.session.exec(select(RoleModel))]
+    async def get_all(self) -> list[Role]:
+        return [self._to_domain(role) for role in await maybe_await(self.session.exec(select(RoleModel)))]
     
-    def save(self, role: Role) -> Role:
+    async def save(self, role: Role) -> Role:
         db_role = RoleModel(**asdict(role))
         self.session.add(db_role)
-        self.session.commit()
-        self.session.refresh(db_role)
+        await maybe_await(self.session.commit())
+        await maybe_await(self.session.refresh(db_role))
         return self._to_domain(db_role)
     
 class UserRoleRepositoryImpl(UserRoleRepositoryDomain):
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
         
     def _to_domain(self, db_user_role: Optional[UserRoleModel]) -> Optional[UserRole]:
         return UserRole(**db_user_role.model_dump()) if db_user_role else None
     
-    def get_by_role_user_id(self, role_id: int, user_id: int) -> Optional[UserRole]:
+    async def get_by_role_user_id(self, role_id: int, user_id: int) -> Optional[UserRole]:
         stmt = select(UserRoleModel).where(
             UserRoleModel.role_id == role_id,
             UserRoleModel.user_id == user_id
         )
-        return self._to_domain(self.session.exec(stmt).first())
+        return self._to_domain((await maybe_await(self.session.exec(stmt))).first())
     
-    def delete_all_by_user_id(self, user_id: int) -> None:
+    async def delete_all_by_user_id(self, user_id: int) -> None:
         stmt = select(UserRoleModel).where(UserRoleModel.user_id == user_id)
-        roles = self.session.exec(stmt).all()
+        roles = (await maybe_await(self.session.exec(stmt))).all()
         for r in roles:
-            self.session.delete(r)
-        self.session.commit()
+            await maybe_await(self.session.delete(r))
+        await maybe_await(self.session.commit())
+    
+    async def replace_user_roles(self, user_id: int, role_ids: list[int]) -> AssignmentDiff:
+        """
+        Deja al usuario exactamente con `role_ids`: borra solo los pares
+        retirados y agrega los nuevos con un insert multi-fila, en un commit
+        que también sube el `rbac_version` del usuario.
+        """
+        stmt = select(UserRoleModel.role_id).where(UserRoleModel.user_id == user_id)
+        current = set((await maybe_await(self.session.exec(stmt))).all())
+        requested = set(role_ids)
+        diff = AssignmentDiff(added=sorted(requested - current), removed=sorted(current - requested))
+        if not diff.changed:
+            return diff
+
+        if diff.removed:
+            await maybe_await(self.session.exec(
+                delete(UserRoleModel).where(
+                    UserRoleModel.user_id == user_id,
+                    UserRoleModel.role_id.in_(diff.removed)
+                )
+            ))
+        if diff.added:
+            now = get_hora_peru()
+            await maybe_await(self.session.exec(
+                insert(UserRoleModel).values([
+                    {"user_id": user_id, "role_id": role_id, "created_at": now, "updated_at": now}
+                    for role_id in diff.added
+                ])
+            ))
+        await maybe_await(self.session.exec(
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(rbac_version=UserModel.rbac_version + 1)
+        ))
+        await maybe_await(self.session.commit())
+        return diff
     
-    def add_user_role(self, user_role: UserRole) -> UserRole:
+    async def add_user_role(self, user_role: UserRole) -> UserRole:
         db_user_role = UserRoleModel(**asdict(user_role))
         self.session.add(db_user_role)
-        self.session.commit()
-        self.session.refresh(db_user_role)
+        await maybe_await(self.session.commit())
+        await maybe_await(self.session.refresh(db_user_role))
         return self._to_domain(db_user_role)
     
 class RolePermissionRepositoryImpl(RolePermissionRepositoryDomain):
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
         
     def _to_domain(self, db_role_permission: Optional[RolePermissionModel]) -> Optional[RolePermission]:
         return RolePermission(**db_role_permission.model_dump()) if db_role_permission else None
     
-    def get_by_role_permission_id(self, role_id: int, permission_id: int) -> Optional[RolePermission]:
+    async def get_by_role_permission_id(self, role_id: int, permission_id: int) -> Optional[RolePermission]:
         stmt = select(RolePermissionModel).where(
             RolePermissionModel.role_id == role_id,
             RolePermissionModel.permission_id == permission_id
         )
-        return self._to_domain(self.session.exec(stmt).first())
+        return self._to_domain((await maybe_await(self.session.exec(stmt))).first())
     
-    def delete_all_by_role_id(self, role_id: int) -> None:
+    async def delete_all_by_role_id(self, role_id: int) -> None:
         stmt = select(RolePermissionModel).where(RolePermissionModel.role_id == role_id)
-        permissions = self.session.exec(stmt).all()
+        permissions = (await maybe_await(self.session.exec(stmt))).all()
         for p in permissions:
-            self.session.delete(p)
-        self.session.commit()
+            await maybe_await(self.session.delete(p))
+        await maybe_await(self.session.commit())
+    
+    async def replace_role_permissions(self, role_id: int, permission_ids: list[int]) -> AssignmentDiff:
+        """
+        Deja al rol exactamente con `permission_ids`: borra solo los pares
+        retirados y agrega los nuevos con un insert multi-fila, en un commit
+        que también sube la versión global de permisos de los roles: una sola
+        fila, sin importar cuántos usuarios tengan el rol.
+        """
+        stmt = select(RolePermissionModel.permission_id).where(RolePermissionModel.role_id == role_id)
+        current = set((await maybe_await(self.session.exec(stmt))).all())
+        requested = set(permission_ids)
+        diff = AssignmentDiff(added=sorted(requested - current), removed=sorted(current - requested))
+        if not diff.changed:
+            return diff
+
+        if diff.removed:
+            await maybe_await(self.session.exec(
+                delete(RolePermissionModel).where(
+                    RolePermissionModel.role_id == role_id,
+                    RolePermissionModel.permission_id.in_(diff.removed)
+                )
+            ))
+        if diff.added:
+            now = get_hora_peru()
+            await maybe_await(self.session.exec(
+                insert(RolePermissionModel).values([
+                    {"role_id": role_id, "permission_id": permission_id, "created_at": now, "updated_at": now}
+                    for permission_id in diff.added
+                ])
+            ))
+        await role_permissions_version.bump(self.session)
+        await maybe_await(self.session.commit())
+        return diff
     
-    def add_role_permission(self, role_permission: RolePermission) -> RolePermission:
+    async def add_role_permission(self, role_permission: RolePermission) -> RolePermission:
         db_role_permission = RolePermissionModel(**asdict(role_permission))
         self.session.add(db_role_permission)
-        self.session.commit()
-        self.session.refresh(db_role_permission)
-        return self._to_domain(db_role_permission)
\ No newline at end of file
+        await maybe_await(self.session.commit())
+        await maybe_await(self.session.refresh(db_role_permission))
+        return self._to_domain(db_role_permission)
@@ -1,5 +1,6 @@
 from shared.base import ValidadorRutasInteligentes
 from ...application.permission.permission_service import PermissionService
+from ...application.role.roles_catalog import catalog_etag
 from .schemas import *
 
 router = ValidadorRutasInteligentes(prefix="/permissions", tags=["Permissions"])
@@ -11,7 +12,8 @@ router.add_use_case(
     handler_instance=permission_service,
     handler_method="get_all",
     schema=None,
-    name="get_all"
+    name="get_all",
+    etag=catalog_etag
 )
 
 router.add_use_case(
@@ -1,5 +1,6 @@
 from shared.base import ValidadorRutasInteligentes
 from ...application.role.role_service import RoleService, UserRoleService, RolePermissionService
+from ...application.role.roles_catalog import catalog_etag
 from .schemas import *
 
 router = ValidadorRutasInteligentes(prefix="/roles", tags=["Roles"])
@@ -13,7 +14,8 @@ router.add_use_case(
     handler_instance=role_service,
     handler_method="get_all",
     schema=None,
-    name="get_all"
+    name="get_all",
+    etag=catalog_etag
 )
 
 router.add_use_case(
@@ -1,26 +1,87 @@
+from typing import Optional
 from .user_query import GetUserWithRolesService
-from .user_dtos import UserWithRolesDTO
-from shared.base import BaseUseCaseHandler, check_password
+from .user_dtos import UserWithRolesDTO, UserPermissionsDTO
+from .user_permissions_cache import user_permissions_cache
+from shared.base import BaseUseCaseHandler, check_password_async, hash_password_async, password_needs_rehash
 from ..infrastructure.user_repository import UserRepositoryImpl
+from shared.config import settings
+from shared.database import maybe_await
 from shared.security.jwt_service import JWTService
+from shared.security.permission_registry import BITMAP_CLAIM, BITMAP_VERSION, BITMAP_VERSION_CLAIM, encode_bitmap
 from ..presentation.schemas import *
 from fastapi import Request
 
+# Versión RBAC efectiva del usuario (`effective_rbac_version()`) con la que se emitió el token
+RBAC_VERSION_CLAIM = "rv"
+# Claims propios de cada token que no se copian al re-emitir
+TOKEN_ONLY_CLAIMS = ("exp", "type")
+
 class AuthService(BaseUseCaseHandler):
+    async def _get_user_permissions(self, user_id: int, rbac_version: Optional[int] = None) -> Optional[UserPermissionsDTO]:
+        """
+        Roles y permisos efectivos del usuario, desde caché o desde la base.
+        Con `rbac_version`, una entrada de caché de otra versión se recarga.
+        """
+        cached = user_permissions_cache.get(user_id)
+        if cached and (rbac_version is None or cached.user.rbac_version == rbac_version):
+            return cached
+        user_roles = await GetUserWithRolesService(self.session).execute(user_id)
+        if not user_roles:
+            return None
+        return user_permissions_cache.set(user_roles)
+
+    @staticmethod
+    def _token_claims(user_permissions: UserPermissionsDTO) -> dict:
+        user = user_permissions.user
+        claims = {
+            "sub": str(user.id), "id": user.id, "email": user.email, "roles": user_permissions.role_names,
+            RBAC_VERSION_CLAIM: user.rbac_version,
+        }
+        if settings.JWT_PERMISSION_BITMAP:
+            claims[BITMAP_CLAIM] = encode_bitmap(user_permissions.permission_ids)
+            claims[BITMAP_VERSION_CLAIM] = BITMAP_VERSION
+        else:
+            claims["permisos"] = list(user_permissions.permissions)
+        return claims
+
+    @staticmethod
+    def _reusable_claims(payload: dict, rbac_version: int) -> Optional[dict]:
+        """
+        Claims del refresh token para el nuevo access token, si su `rv` sigue
+        vigente y traen los permisos en el formato que se emite hoy.
+        """
+        if payload.get(RBAC_VERSION_CLAIM) != rbac_version:
+            return None
+        if settings.JWT_PERMISSION_BITMAP:
+            if BITMAP_CLAIM not in payload or payload.get(BITMAP_VERSION_CLAIM) != BITMAP_VERSION:
+                return None
+        elif "permisos" not in payload:
+            return None
+        return {key: value for key, value in payload.items() if key not in TOKEN_ONLY_CLAIMS}
+
     async def login(self, request: Request, **kwargs):
         body: LoginSchema = request.state.body # Asumiendo que se usa un schema de Login
         repo = UserRepositoryImpl(self.session)
         
-        user = repo.get_by_email(body.email)
-        if not user or not check_password(body.password, user.password):
+        user = await repo.get_by_email(body.email)
+        # Devolver la conexión al pool antes de esperar a bcrypt: una sesión
+        # síncrona no debe retener una conexión a través de un await
+        await maybe_await(self.session.commit())
+        if not user or not await check_password_async(body.password, user.password):
             return self.return_json(
                 est=False, ico="error", 
                 msg="Credenciales inválidas.", status_code=401
             )
+        if password_needs_rehash(user.password):
+            # Costo distinto del vigente: se re-hashea con la contraseña ya verificada
+            # y se guarda en una unidad de trabajo corta, después de bcrypt
+            password_hash = await hash_password_async(body.password)
+            await repo.update_password(user.id, password_hash)
         
-        user_roles = GetUserWithRolesService(self.session).execute(user.id)
-        set_permisos = set([p.name for r in user_roles.roles for p in r.permissions])
-        user_data = {"sub": str(user_roles.id), "id": user_roles.id, "email": user_roles.email, "roles": [r.name for r in user_roles.roles], "permisos": list(set_permisos)}
+        rbac_version = await repo.get_rbac_version(user.id)
+        user_permissions = await self._get_user_permissions(user.id, rbac_version)
+        user_roles = user_permissions.user
+        user_data = self._token_claims(user_permissions)
         access_token = JWTService.create_access_token(user_data)
         refresh_token = JWTService.create_refresh_token(user_data)
         
@@ -32,7 +93,7 @@ class AuthService(BaseUseCaseHandler):
                 "user": {
                     "id": user_roles.id,
                     "email": user_roles.email,
-                    "roles": [r.name for r in user_roles.roles]
+                    "roles": user_permissions.role_names
                 }
             }
         )
@@ -47,18 +108,19 @@ class AuthService(BaseUseCaseHandler):
                 msg="Refresh token inválido o expirado.", status_code=401
             )
         
-        # Generar nuevo access token con roles y permisos actualizados
+        # Si la versión RBAC del usuario no cambió, los claims del refresh
+        # siguen vigentes; si cambió, se recargan roles y permisos
         user_id = int(payload["sub"])
-        user_roles = GetUserWithRolesService(self.session).execute(user_id)
-        set_permisos = set([p.name for r in user_roles.roles for p in r.permissions])
-        
-        user_data = {
-            "sub": str(user_roles.id), 
-            "id": user_roles.id, 
-            "email": user_roles.email, 
-            "roles": [r.name for r in user_roles.roles], 
-            "permisos": list(set_permisos)
-        }
+        rbac_version = await UserRepositoryImpl(self.session).get_rbac_version(user_id)
+        user_data = self._reusable_claims(payload, rbac_version) if rbac_version is not None else None
+        if user_data is None:
+            user_permissions = await self._get_user_permissions(user_id, rbac_version) if rbac_version is not None else None
+            if not user_permissions:
+                return self.return_json(
+                    est=False, ico="error", 
+                    msg="Refresh token inválido o expirado.", status_code=401
+                )
+            user_data = self._token_claims(user_permissions)
         
         new_access_token = JWTService.create_access_token(user_data)
 
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 from datetime import datetime
 from app.roles.application.role.role_dtos import PermissionDTO
 
@@ -18,5 +18,16 @@ class UserWithRolesDTO:
     email: str
     roles: List[RolesDTO]
     is_active: bool = True
+    rbac_version: int = 0
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+
+@dataclass(frozen=True)
+class UserPermissionsDTO:
+    user: UserWithRolesDTO
+    permissions: FrozenSet[str]
+    permission_ids: FrozenSet[int] = frozenset()
+
+    @property
+    def role_names(self) -> List[str]:
+        return [r.name for r in self.user.roles]
@@ -0,0 +1,74 @@
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from shared.cache import TTLCache
+from shared.config import settings
+from shared.database import after_commit
+from .user_dtos import UserPermissionsDTO, UserWithRolesDTO
+
+
+class UserPermissionsCache:
+    """
+    Caché en proceso de los roles y permisos efectivos de cada usuario.
+    - Las entradas se indexan por rol para que un cambio en los permisos de
+      un rol invalide solo a los usuarios que lo tienen asignado.
+    - `invalidate_user()` / `invalidate_role()` actúan al confirmar la
+      transacción en curso, como el resto de cachés: una lectura concurrente
+      previa al commit no vuelve a cachear los permisos viejos.
+    - La invalidación es local al proceso; con varios workers el TTL acota
+      el tiempo máximo que un cambio tarda en verse en los demás.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._users_by_role: Dict[int, Set[int]] = defaultdict(set)
+        self._cache = TTLCache(max_size, ttl_seconds, on_evict=self._unindex)
+
+    def get(self, user_id: int) -> Optional[UserPermissionsDTO]:
+        return self._cache.get(user_id)
+
+    def set(self, user: UserWithRolesDTO) -> UserPermissionsDTO:
+        entry = UserPermissionsDTO(
+            user=user,
+            permissions=frozenset(p.name for r in user.roles for p in r.permissions),
+            permission_ids=frozenset(p.id for r in user.roles for p in r.permissions)
+        )
+        if not self._cache.enabled:
+            return entry
+        self._cache.set(user.id, entry)
+        for role in user.roles:
+            self._users_by_role[role.id].add(user.id)
+        return entry
+
+    def invalidate_user(self, user_id: int) -> None:
+        after_commit(lambda: self._drop_user(user_id))
+
+    def invalidate_role(self, role_id: int) -> None:
+        after_commit(lambda: self._drop_role(role_id))
+
+    def _drop_user(self, user_id: int) -> None:
+        self._cache.pop(user_id)
+
+    def _drop_role(self, role_id: int) -> None:
+        for user_id in list(self._users_by_role.get(role_id, ())):
+            self._cache.pop(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def _unindex(self, user_id: int, entry: UserPermissionsDTO) -> None:
+        for role in entry.user.roles:
+            users = self._users_by_role.get(role.id)
+            if users is None:
+                continue
+            users.discard(user_id)
+            if not users:
+                del self._users_by_role[role.id]
+
+
+user_permissions_cache = UserPermissionsCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
@@ -1,19 +1,33 @@
 from collections import defaultdict
+from typing import AsyncIterator, Optional, Union
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from shared.database import maybe_await
 from .user_dtos import UserWithRolesDTO, RolesDTO
 from app.roles.application.role.role_dtos import PermissionDTO
-from ..infrastructure.user_model import User as UserModel
+from ..infrastructure.user_model import User as UserModel, effective_rbac_version
 from app.roles.infrastructure.role_model import Role as RoleModel, UserRole as UserRoleModel, RolePermission as RolePermissionModel, Permission as PermissionModel
 
 
 class GetUsersWithRolesService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
 
-    def execute(self) -> list[UserWithRolesDTO]:
-        users = self.session.exec(select(UserModel)).all()
+    async def execute(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> list[UserWithRolesDTO]:
+        """
+        Usuarios con sus roles y permisos, paginados por keyset (`id > after_id`).
+        Roles y permisos se consultan solo para el rango de ids de la página.
+        """
+        stmt = select(UserModel.id, UserModel.email, UserModel.is_active).order_by(UserModel.id)
+        if after_id is not None:
+            stmt = stmt.where(UserModel.id > after_id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        users = (await maybe_await(self.session.exec(stmt))).all()
+        if not users:
+            return []
 
-        # Roles por usuario
+        # Roles por usuario (solo los usuarios de la página)
         stmt = (
             select(
                 UserRoleModel.user_id,
@@ -22,30 +36,34 @@ class GetUsersWithRolesService:
                 RoleModel.description
             )
             .join(RoleModel, RoleModel.id == UserRoleModel.role_id)
+            .where(UserRoleModel.user_id.between(users[0].id, users[-1].id))
         )
-        rows = self.session.exec(stmt).all()
-
-        # Permisos por rol
-        stmt = (
-            select(
-                RolePermissionModel.role_id,
-                PermissionModel.id,
-                PermissionModel.name,
-                PermissionModel.description
-            )
-            .join(PermissionModel, PermissionModel.id == RolePermissionModel.permission_id)
-        )
-        permissions = self.session.exec(stmt).all()
+        rows = (await maybe_await(self.session.exec(stmt))).all()
 
+        # Permisos por rol (solo los roles presentes en la página)
         roles_permissions = defaultdict(list)
-        for role_id, perm_id, perm_name, perm_desc in permissions:
-            roles_permissions[role_id].append(
-                PermissionDTO(
-                    id=perm_id,
-                    name=perm_name,
-                    description=perm_desc
+        role_ids = {row[1] for row in rows}
+        if role_ids:
+            stmt = (
+                select(
+                    RolePermissionModel.role_id,
+                    PermissionModel.id,
+                    PermissionModel.name,
+                    PermissionModel.description
                 )
+                .join(PermissionModel, PermissionModel.id == RolePermissionModel.permission_id)
+                .where(RolePermissionModel.role_id.in_(role_ids))
             )
+            permissions = (await maybe_await(self.session.exec(stmt))).all()
+
+            for role_id, perm_id, perm_name, perm_desc in permissions:
+                roles_permissions[role_id].append(
+                    PermissionDTO(
+                        id=perm_id,
+                        name=perm_name,
+                        description=perm_desc
+                    )
+                )
 
         user_roles = defaultdict(list)
         for user_id, role_id, role_name, role_desc in rows:
@@ -59,69 +77,104 @@ class GetUsersWithRolesService:
             )
 
         result = []
-        for user in users:
+        for user_id, email, is_active in users:
             result.append(
                 UserWithRolesDTO(
-                    id=user.id,
-                    email=user.email,
-                    roles=user_roles.get(user.id, [])
+                    id=user_id,
+                    email=email,
+                    is_active=is_active,
+                    roles=user_roles.get(user_id, [])
                 )
             )
 
         return result
+
+    async def iter_chunks(
+        self,
+        chunk_size: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[list[UserWithRolesDTO]]:
+        """
+        Recorre los usuarios en bloques de `chunk_size` por keyset, de modo
+        que la memoria usada no depende del total de usuarios. Cada bloque
+        cierra su transacción antes de entregarse: mientras el consumidor lo
+        procesa no se retiene conexión del pool.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await self.execute(after_id=after_id, limit=size)
+            await maybe_await(self.session.commit())
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < size:
+                return
+            after_id = chunk[-1].id
+            if remaining is not None:
+                remaining -= len(chunk)
     
 class GetUserWithRolesService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
 
-    def execute(self, user_id: int) -> UserWithRolesDTO:
-        user = self.session.get(UserModel, user_id)
-
+    async def execute(self, user_id: int) -> Optional[UserWithRolesDTO]:
+        """
+        Obtiene un usuario con sus roles y permisos en una sola consulta
+        filtrada por `user_id`; el costo depende solo de las asignaciones
+        del usuario y no del tamaño total de las tablas RBAC.
+        """
         stmt = (
             select(
-                UserRoleModel.user_id,
+                UserModel.id,
+                UserModel.email,
+                UserModel.is_active,
+                effective_rbac_version(),
                 RoleModel.id,
                 RoleModel.name,
-                RoleModel.description
-            )
-            .join(RoleModel, RoleModel.id == UserRoleModel.role_id)
-        )
-        rows = self.session.exec(stmt).all()    
-
-        stmt = (
-            select(
-                RolePermissionModel.role_id,
+                RoleModel.description,
                 PermissionModel.id,
                 PermissionModel.name,
                 PermissionModel.description
             )
-            .join(PermissionModel, PermissionModel.id == RolePermissionModel.permission_id)
+            .select_from(UserModel)
+            .outerjoin(UserRoleModel, UserRoleModel.user_id == UserModel.id)
+            .outerjoin(RoleModel, RoleModel.id == UserRoleModel.role_id)
+            .outerjoin(RolePermissionModel, RolePermissionModel.role_id == RoleModel.id)
+            .outerjoin(PermissionModel, PermissionModel.id == RolePermissionModel.permission_id)
+            .where(UserModel.id == user_id)
         )
-        permissions = self.session.exec(stmt).all()
-        
-        roles_permissions = defaultdict(list)
-        for role_id, perm_id, perm_name, perm_desc in permissions:
-            roles_permissions[role_id].append(
-                PermissionDTO(
-                    id=perm_id,
-                    name=perm_name,
-                    description=perm_desc
-                )
-            )
+        rows = (await maybe_await(self.session.exec(stmt))).all()
+        if not rows:
+            return None
 
-        user_roles = defaultdict(list)
-        for user_id, role_id, role_name, role_desc in rows:
-            user_roles[user_id].append(
-                RolesDTO(
+        db_user_id, email, is_active, rbac_version = rows[0][:4]
+        roles: dict[int, RolesDTO] = {}
+        for *_, role_id, role_name, role_desc, perm_id, perm_name, perm_desc in rows:
+            if role_id is None:
+                continue
+            role = roles.get(role_id)
+            if role is None:
+                role = roles[role_id] = RolesDTO(
                     id=role_id,
                     name=role_name,
                     description=role_desc,
-                    permissions=roles_permissions.get(role_id, [])
+                    permissions=[]
+                )
+            if perm_id is not None:
+                role.permissions.append(
+                    PermissionDTO(
+                        id=perm_id,
+                        name=perm_name,
+                        description=perm_desc
+                    )
                 )
-            )
 
         return UserWithRolesDTO(
-            id=user.id,
-            email=user.email,
-            roles=user_roles.get(user.id, []),
-        )
\ No newline at end of file
+            id=db_user_id,
+            email=email,
+            is_active=is_active,
+            roles=list(roles.values()),
+            rbac_version=rbac_version,
+        )
@@ -1,12 +1,22 @@
+from typing import Any, AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
 from ..domain.exceptions import UserAlreadyExistsError
 from ..domain.user_domain_service import UserDomainService
 from ..domain.user import User
+from shared.admission import password_hashing_limiter
 from shared.base import *
+from shared.database import maybe_await, simple_session
+from shared.serialization import json_dumps
 from ..infrastructure.user_repository import UserRepositoryImpl
 from fastapi import Request
 from ..presentation.schemas import *
 from .user_dtos import UserWithRolesDTO
 from .user_query import GetUsersWithRolesService, GetUserWithRolesService
+from .user_permissions_cache import user_permissions_cache
+from .users_version import NDJSON_MEDIA_TYPE, users_version, wants_ndjson
+
+USERS_PAGE_MAX_LIMIT = 1000
+USERS_STREAM_CHUNK_SIZE = 500
 
 class UserService(BaseUseCaseHandler):
     
@@ -15,9 +25,8 @@ class UserService(BaseUseCaseHandler):
         Caso de uso para obtener un usuario por su ID.
         """
         repo = UserRepositoryImpl(self.session)
-        print(request.state.usuario)
         id_user = kwargs["id_user"] if kwargs["id_user"] not in [0, "0"] else request.state.usuario["id"]
-        user = GetUserWithRolesService(self.session).execute(id_user)
+        user = await GetUserWithRolesService(self.session).execute(id_user)
         
         if not user:
             return self.return_json(
@@ -40,31 +49,91 @@ class UserService(BaseUseCaseHandler):
             data=datos_user
         )
     
-    async def get_all_users_with_roles(self, request: Request):
+    async def get_all_users_with_roles(self, request: Request, **kwargs):
         """
-        Lista todos los usuarios con sus respectivos nombres de roles.
+        Lista los usuarios con sus respectivos nombres de roles.
+        - `after_id` / `limit`: paginación por keyset; si hay más páginas se
+          devuelve el cursor siguiente en la cabecera `X-Next-After-Id`. Sin
+          `limit` se devuelven todos los usuarios (desde `after_id`), con la
+          misma forma, serializados en streaming por bloques.
+        - `format=ndjson` (o `Accept: application/x-ndjson`): respuesta en
+          streaming, un usuario por línea, leída por bloques; sin `limit`
+          recorre todos los usuarios.
         """
+        try:
+            after_id = int(kwargs["after_id"]) if kwargs.get("after_id") not in (None, "") else None
+            limit = int(kwargs["limit"]) if kwargs.get("limit") not in (None, "") else None
+        except ValueError:
+            return self.return_json(
+                est=False,
+                ico="error",
+                msg="Los parámetros after_id y limit deben ser enteros.",
+                status_code=400
+            )
+        if limit is not None and not 0 < limit <= USERS_PAGE_MAX_LIMIT:
+            return self.return_json(
+                est=False,
+                ico="error",
+                msg=f"El parámetro limit debe estar entre 1 y {USERS_PAGE_MAX_LIMIT}.",
+                status_code=400
+            )
+
+        # Los streams leen de la misma réplica en la que se leyó la versión del ETag
+        if wants_ndjson(request, kwargs):
+            return StreamingResponse(self._stream_users(self.session.bind, after_id, limit), media_type=NDJSON_MEDIA_TYPE)
+        if limit is None:
+            return StreamingResponse(self._stream_users_json(self.session.bind, after_id), media_type="application/json")
+
         service = GetUsersWithRolesService(self.session)
-        all_users: list[UserWithRolesDTO] = service.execute()
-        users = []
-        for u in all_users:
-            users.append({
-                "id": u.id,
-                "email": u.email,
-                "roles_id": [{"id": r.id, "permissions_id": [p.id for p in r.permissions]} for r in u.roles],
-                "roles": [{
-                    "id": r.id,
-                    "name": r.name,
-                    "permissions": [p.name for p in r.permissions]
-                } for r in u.roles]
-            })
+        all_users: list[UserWithRolesDTO] = await service.execute(after_id=after_id, limit=limit)
+        users = [self._user_to_dict(u) for u in all_users]
+
+        headers = None
+        if len(all_users) == limit:
+            headers = {"X-Next-After-Id": str(all_users[-1].id)}
         
         return self.return_json(
             est=True,
             ico="success",
             msg="Usuarios obtenidos correctamente",
-            data=users
+            data=users,
+            headers=headers
         )
+
+    async def _iter_user_chunks(self, bind: Any, after_id: Optional[int], limit: Optional[int]) -> AsyncIterator[list[UserWithRolesDTO]]:
+        # El streaming continúa después de cerrar la sesión del request: usa la suya propia
+        async with simple_session(bind=bind) as session:
+            service = GetUsersWithRolesService(session)
+            async for chunk in service.iter_chunks(USERS_STREAM_CHUNK_SIZE, after_id=after_id, limit=limit):
+                yield chunk
+
+    async def _stream_users(self, bind: Any, after_id: Optional[int], limit: Optional[int]) -> AsyncIterator[bytes]:
+        async for chunk in self._iter_user_chunks(bind, after_id, limit):
+            yield b"".join(json_dumps(self._user_to_dict(u)) + b"\n" for u in chunk)
+
+    async def _stream_users_json(self, bind: Any, after_id: Optional[int]) -> AsyncIterator[bytes]:
+        # Mismo cuerpo que `return_json` con todos los usuarios en `data`, escrito por bloques
+        envelope = json_dumps({"estado": True, "icono": "success", "message": "Usuarios obtenidos correctamente"})
+        yield envelope[:-1] + b',"data":['
+        separator = b""
+        async for chunk in self._iter_user_chunks(bind, after_id, None):
+            if chunk:
+                yield separator + b",".join(json_dumps(self._user_to_dict(u)) for u in chunk)
+                separator = b","
+        yield b"]}"
+
+    @staticmethod
+    def _user_to_dict(u: UserWithRolesDTO) -> dict:
+        return {
+            "id": u.id,
+            "email": u.email,
+            "roles_id": [{"id": r.id, "permissions_id": [p.id for p in r.permissions]} for r in u.roles],
+            "roles": [{
+                "id": r.id,
+                "name": r.name,
+                "permissions": [p.name for p in r.permissions]
+            } for r in u.roles]
+        }
     
     async def create_user(self, request: Request):
 
@@ -74,10 +143,10 @@ class UserService(BaseUseCaseHandler):
         domain_service = UserDomainService(repo)
 
         try:
-            user = domain_service.create_user(
+            user = await domain_service.create_user(
                 User(
                     email=body.email,
-                    password=hash_password(body.password)
+                    password=await hash_password_async(body.password)
                 )
             )
         except UserAlreadyExistsError as e:
@@ -87,6 +156,7 @@ class UserService(BaseUseCaseHandler):
                 msg=str(e),
                 status_code=409
             )
+        await users_version.bump(self.session)
 
         return self.return_json(
             est=True,
@@ -100,6 +170,69 @@ class UserService(BaseUseCaseHandler):
             status_code=201
         )
 
+    async def create_users_bulk(self, request: Request):
+        """
+        Alta masiva: conflictos de email resueltos con una sola consulta,
+        contraseñas hasheadas en paralelo en el pool de bcrypt e inserts
+        multi-fila en una transacción. Cada contraseña pide su turno en el
+        control de admisión compartido; si alguna se rechaza, no se crea nada. Devuelve un resultado por ítem, en el
+        orden recibido: `created`, `exists` (ya registrado) o `duplicate`
+        (repetido dentro del lote).
+        """
+        body: BulkCreateUsersSchema = request.state.body
+
+        repo = UserRepositoryImpl(self.session)
+        domain_service = UserDomainService(repo)
+
+        existing = await domain_service.existing_emails(u.email for u in body.users)
+        # La consulta ya terminó: liberar la conexión mientras se hashea
+        await maybe_await(self.session.commit())
+
+        statuses, new_items, seen = [], [], set()
+        for item in body.users:
+            if item.email in existing:
+                statuses.append("exists")
+            elif item.email in seen:
+                statuses.append("duplicate")
+            else:
+                statuses.append("created")
+                new_items.append(item)
+            seen.add(item.email)
+
+        hashes = await hash_passwords_async([item.password for item in new_items], password_hashing_limiter())
+        try:
+            created = await domain_service.create_users([
+                User(email=item.email, password=password_hash)
+                for item, password_hash in zip(new_items, hashes)
+            ])
+        except UserAlreadyExistsError as e:
+            return self.return_json(
+                est=False,
+                ico="warning",
+                msg=f"{str(e)}; reintente el lote.",
+                status_code=409
+            )
+        if created:
+            await users_version.bump(self.session)
+
+        ids_by_email = {user.email: user.id for user in created}
+        results = [
+            {
+                "index": index,
+                "email": item.email,
+                "status": status,
+                "id": ids_by_email[item.email] if status == "created" else None
+            }
+            for index, (item, status) in enumerate(zip(body.users, statuses))
+        ]
+        return self.return_json(
+            est=True,
+            ico="success",
+            msg=f"{len(created)} de {len(results)} usuarios creados",
+            data=results,
+            status_code=201 if created else 200
+        )
+
     async def update_user(self, request: Request, **kwargs):
         body: UpdateUserSchema = request.state.body
         id_user = kwargs["id_user"]
@@ -108,8 +241,8 @@ class UserService(BaseUseCaseHandler):
         domain_service = UserDomainService(repo)
 
         try:
-            password_hash = hash_password(body.password) if body.password else None
-            user = domain_service.update_user(
+            password_hash = await hash_password_async(body.password) if body.password else None
+            user = await domain_service.update_user(
                 User(
                     id=id_user,
                     email=body.email,
@@ -123,6 +256,8 @@ class UserService(BaseUseCaseHandler):
                 msg=str(e),
                 status_code=409
             )
+        user_permissions_cache.invalidate_user(user.id)
+        await users_version.bump(self.session)
 
         return self.return_json(
             est=True,
@@ -0,0 +1,37 @@
+from typing import Any, Dict
+
+from fastapi import Request
+
+from shared.database import get_session
+from shared.versioning import DataVersion
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Versión del listado de usuarios con sus roles y permisos (ETag de GET /users/all)
+users_version = DataVersion("users")
+
+
+def wants_ndjson(request: Request, kwargs: Dict[str, Any]) -> bool:
+    return kwargs.get("format") == "ndjson" or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _page_param(value: Any) -> str:
+    # Parámetro normalizado para la etiqueta; los inválidos responden 400 y nunca llevan ETag
+    if value in (None, ""):
+        return ""
+    try:
+        return str(int(value))
+    except ValueError:
+        return "-"
+
+
+async def users_etag(request: Request, **kwargs) -> str:
+    """
+    Versión del listado más la representación pedida (formato y página):
+    JSON y NDJSON, o dos páginas distintas, no comparten etiqueta. Se lee
+    en la sesión del request, la misma réplica de la que sale el cuerpo.
+    """
+    version = await users_version.current(get_session())
+    representation = "ndjson" if wants_ndjson(request, kwargs) else "json"
+    after_id, limit = _page_param(kwargs.get("after_id")), _page_param(kwargs.get("limit"))
+    return f"users.{version}.{representation}.{after_id}.{limit}"
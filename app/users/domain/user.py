@@ -9,6 +9,7 @@ class User:
 
     id: Optional[int] = None
     is_active: bool = True
+    rbac_version: Optional[int] = None
 
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -1,3 +1,4 @@
+from typing import Iterable, List, Set
 from app.users.domain.user_repository import UserRepository
 from app.users.domain.user import User
 from app.users.domain.exceptions import UserAlreadyExistsError
@@ -6,20 +7,31 @@ class UserDomainService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
-    def create_user(self, user: User) -> User:
-        existing = self.user_repository.get_by_email(user.email)
+    async def create_user(self, user: User) -> User:
+        existing = await self.user_repository.get_by_email(user.email)
         if existing:
             raise UserAlreadyExistsError("El email del usuario ya existe")
 
-        return self.user_repository.save(user)
+        return await self.user_repository.save(user)
+
+    async def existing_emails(self, emails: Iterable[str]) -> Set[str]:
+        return await self.user_repository.get_existing_emails(emails)
+
+    async def create_users(self, users: List[User]) -> List[User]:
+        """
+        Alta masiva de usuarios cuyos emails ya se verificaron con
+        `existing_emails`; un alta concurrente del mismo email hace fallar
+        el lote completo con UserAlreadyExistsError.
+        """
+        return await self.user_repository.save_many(users)
     
-    def update_user(self, user: User) -> User:
-        existing = self.user_repository.get_by_id(user.id)
-        existing_email = self.user_repository.get_by_email_except_id(user.email, user.id)
+    async def update_user(self, user: User) -> User:
+        existing = await self.user_repository.get_by_id(user.id)
+        existing_email = await self.user_repository.get_by_email_except_id(user.email, user.id)
         if not existing:
             raise UserAlreadyExistsError("El usuario no existe")
 
         if existing_email:
             raise UserAlreadyExistsError("El email del usuario ya existe")
 
-        return self.user_repository.update(user)
\ No newline at end of file
+        return await self.user_repository.update(user)
\ No newline at end of file
@@ -1,24 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List, Tuple
+from typing import Iterable, Optional, List, Set, Tuple
 from .user import User
 
 class UserRepository(ABC):
     @abstractmethod
-    def get_by_id(self, user_id: int) -> Optional[User]:
+    async def get_by_id(self, user_id: int) -> Optional[User]:
         pass
     
     @abstractmethod
-    def get_by_email(self, email: str) -> Optional[User]:
+    async def get_by_email(self, email: str) -> Optional[User]:
         pass
     
     @abstractmethod
-    def get_by_email_except_id(self, email: str, user_id: int) -> Optional[User]:
+    async def get_by_email_except_id(self, email: str, user_id: int) -> Optional[User]:
         pass
     
     @abstractmethod
-    def save(self, user: User) -> User:
+    async def get_existing_emails(self, emails: Iterable[str]) -> Set[str]:
         pass
     
     @abstractmethod
-    def update(self, user: User) -> User:
+    async def get_rbac_version(self, user_id: int) -> Optional[int]:
+        pass
+    
+    @abstractmethod
+    async def save(self, user: User) -> User:
+        pass
+    
+    @abstractmethod
+    async def save_many(self, users: List[User]) -> List[User]:
+        pass
+    
+    @abstractmethod
+    async def update(self, user: User) -> User:
+        pass
+    
+    @abstractmethod
+    async def update_password(self, user_id: int, password_hash: str) -> None:
         pass
\ No newline at end of file
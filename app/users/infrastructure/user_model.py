@@ -1,6 +1,7 @@
 from sqlmodel import Field, Relationship
 from typing import Optional, List
 from shared.base import BaseModel
+from shared.versioning import DataVersion
 from app.roles.infrastructure.role_model import Role, UserRole
 
 class User(BaseModel, table=True):
@@ -10,10 +11,24 @@ class User(BaseModel, table=True):
     email: str = Field(nullable=False, max_length=100, unique=True)
     password: str = Field(nullable=False, max_length=250)
     is_active: bool = Field(default=True)
+    # Sube con cada cambio de roles (o de email) del usuario; sumada a la
+    # versión global de permisos de los roles da el `rv` de los tokens
+    rbac_version: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
 
     roles: List[Role] = Relationship(
         back_populates="users",
         link_model=UserRole
     )
-    
 
+
+# Sube una vez por cada cambio de permisos de un rol, sin tocar a sus usuarios
+role_permissions_version = DataVersion("rbac")
+
+
+def effective_rbac_version():
+    """
+    Versión RBAC efectiva del usuario (claim `rv`): su `rbac_version` más la
+    de permisos de los roles. Ambas solo suben, así que la suma cambia con
+    cualquiera de las dos.
+    """
+    return User.rbac_version + role_permissions_version.column()
@@ -1,41 +1,99 @@
-from dataclasses import asdict
-from typing import Optional, List, Tuple
+from dataclasses import asdict, replace
+from typing import Iterable, Optional, List, Set, Tuple, Union
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.users.application.user_dtos import UserWithRolesDTO
+from shared.database import maybe_await
+from shared.utils import get_hora_peru
+from ..domain.exceptions import UserAlreadyExistsError
 from ..domain.user import User
 from ..domain.user_repository import UserRepository
-from .user_model import User as UserModel
+from .user_model import User as UserModel, effective_rbac_version
+
+# Filas por sentencia INSERT multi-fila en `save_many`
+BULK_INSERT_CHUNK = 500
 
 class UserRepositoryImpl(UserRepository):
-    def __init__(self, session: Session):
+    def __init__(self, session: Union[Session, AsyncSession]):
         self.session = session
 
     def _to_domain(self, db_user: Optional[UserModel]) -> Optional[User]:
         return User(**db_user.model_dump()) if db_user else None
 
-    def get_by_id(self, user_id: int) -> Optional[User]:
-        return self._to_domain(self.session.get(UserModel, user_id))
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        return self._to_domain(await maybe_await(self.session.get(UserModel, user_id)))
 
-    def get_by_email(self, email: str) -> Optional[User]:
-        return self._to_domain(self.session.exec(select(UserModel).where(UserModel.email == email)).first())
+    async def get_by_email(self, email: str) -> Optional[User]:
+        stmt = select(UserModel).where(UserModel.email == email)
+        return self._to_domain((await maybe_await(self.session.exec(stmt))).first())
 
-    def get_by_email_except_id(self, email: str, user_id: int) -> Optional[User]:
+    async def get_by_email_except_id(self, email: str, user_id: int) -> Optional[User]:
         stmt = select(UserModel).where(UserModel.email == email, UserModel.id != user_id)
-        return self._to_domain(self.session.exec(stmt).first())
+        return self._to_domain((await maybe_await(self.session.exec(stmt))).first())
+
+    async def get_existing_emails(self, emails: Iterable[str]) -> Set[str]:
+        emails = set(emails)
+        if not emails:
+            return set()
+        stmt = select(UserModel.email).where(UserModel.email.in_(emails))
+        return set((await maybe_await(self.session.exec(stmt))).all())
+
+    async def get_rbac_version(self, user_id: int) -> Optional[int]:
+        stmt = select(effective_rbac_version()).where(UserModel.id == user_id)
+        return (await maybe_await(self.session.exec(stmt))).first()
 
-    def save(self, user: User) -> User:
+    async def save(self, user: User) -> User:
         db_user = UserModel(**asdict(user))
         self.session.add(db_user)
-        self.session.commit()
-        self.session.refresh(db_user)
+        await maybe_await(self.session.commit())
+        await maybe_await(self.session.refresh(db_user))
         return self._to_domain(db_user)
 
-    def update(self, user: User) -> User:
-        db_user = self.session.get(UserModel, user.id)
+    async def save_many(self, users: List[User]) -> List[User]:
+        """
+        Inserta los usuarios con INSERT multi-fila (bloques de BULK_INSERT_CHUNK)
+        y un solo commit; los ids vuelven con RETURNING.
+        """
+        if not users:
+            return []
+        now = get_hora_peru()
+        ids_by_email = {}
+        try:
+            for start in range(0, len(users), BULK_INSERT_CHUNK):
+                stmt = insert(UserModel).values([
+                    {"email": u.email, "password": u.password, "is_active": u.is_active, "created_at": now, "updated_at": now}
+                    for u in users[start:start + BULK_INSERT_CHUNK]
+                ]).returning(UserModel.id, UserModel.email)
+                ids_by_email.update({email: user_id for user_id, email in await maybe_await(self.session.exec(stmt))})
+            await maybe_await(self.session.commit())
+        except IntegrityError as e:
+            await maybe_await(self.session.rollback())
+            raise UserAlreadyExistsError("El email de algún usuario ya existe") from e
+        return [
+            replace(u, id=ids_by_email[u.email], rbac_version=0, created_at=now, updated_at=now)
+            for u in users
+        ]
+
+    async def update(self, user: User) -> User:
+        db_user = await maybe_await(self.session.get(UserModel, user.id))
         if not db_user: return None
+        if user.email is not None and user.email != db_user.email:
+            # El email va en los claims del token: invalida los refresh ya emitidos
+            db_user.rbac_version += 1
         for key, val in asdict(user).items():
             if val is not None: setattr(db_user, key, val)
-        self.session.commit()
-        self.session.refresh(db_user)
-        return self._to_domain(db_user)
\ No newline at end of file
+        await maybe_await(self.session.commit())
+        await maybe_await(self.session.refresh(db_user))
+        return self._to_domain(db_user)
+
+    async def update_password(self, user_id: int, password_hash: str) -> None:
+        """
+        Reemplaza solo el hash de la contraseña, con un UPDATE y sin leer la
+        fila: el resto de columnas (`is_active`, `rbac_version`) no cambia.
+        """
+        stmt = update(UserModel).where(UserModel.id == user_id).values(password=password_hash)
+        await maybe_await(self.session.exec(stmt))
+        await maybe_await(self.session.commit())
@@ -1,10 +1,15 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+USERS_BULK_MAX_SIZE = 1000
 
 class CreateUserSchema(BaseModel):
     email: str
     password: str
     
+class BulkCreateUsersSchema(BaseModel):
+    users: List[CreateUserSchema] = Field(min_length=1, max_length=USERS_BULK_MAX_SIZE)
+
 class UpdateUserSchema(BaseModel):
     email: str
     password: Optional[str] = None
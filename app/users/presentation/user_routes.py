@@ -1,13 +1,19 @@
+from shared.admission import ConcurrencyLimit
 from shared.base import ValidadorRutasInteligentes
 from app.users.application.user_service import UserService
 from app.users.presentation.schemas import *
 
 from app.users.application.auth_service import AuthService
+from app.users.application.users_version import users_etag
 
 router = ValidadorRutasInteligentes(prefix="/users", tags=["Users"])
 user_service = UserService()
 auth_service = AuthService()
 
+# Rutas que ejecutan bcrypt: cola acotada y rechazo rápido para que una
+# ráfaga de logins no dispare la latencia del resto de rutas
+password_limit = ConcurrencyLimit.for_password_hashing()
+
 # Rutas de Autenticación
 router.add_use_case(
     path="/login",
@@ -15,7 +21,8 @@ router.add_use_case(
     handler_instance=auth_service,
     handler_method="login",
     schema=LoginSchema,
-    name="login"
+    name="login",
+    limit=password_limit
 )
 
 router.add_use_case(
@@ -32,7 +39,10 @@ router.add_use_case(
     method="GET",
     handler_instance=user_service,
     handler_method="get_all_users_with_roles",
-    name="get_all_users_with_roles"
+    name="get_all_users_with_roles",
+    etag=users_etag,
+    # JSON o NDJSON según Accept
+    vary="Accept"
 )
 
 # Ejemplo de GET (Protegido)
@@ -43,7 +53,9 @@ router.add_use_case(
     handler_method="get_user_by_id",
     name="get_user",
     protected=True,
-    required_roles=["Administrador"]
+    required_roles=["Administrador"],
+    # Lectura tras escritura (p. ej. después de un PUT): no depender del lag de la réplica
+    use_primary=True
 )
 
 # Ejemplo de POST
@@ -53,7 +65,19 @@ router.add_use_case(
     handler_instance=user_service,
     handler_method="create_user",
     name="post_user",
-    schema=CreateUserSchema
+    schema=CreateUserSchema,
+    limit=password_limit
+)
+
+# Sin límite por request: el handler pide un turno de `password_limit` por
+# contraseña, así un lote pesa en la admisión lo que hashea
+router.add_use_case(
+    path="/bulk",
+    method="POST",
+    handler_instance=user_service,
+    handler_method="create_users_bulk",
+    name="post_users_bulk",
+    schema=BulkCreateUsersSchema
 )
 
 # Ejemplo de PUT
@@ -63,5 +87,6 @@ router.add_use_case(
     handler_instance=user_service,
     handler_method="update_user",
     name="put_user",
-    schema=UpdateUserSchema
+    schema=UpdateUserSchema,
+    limit=password_limit
 )
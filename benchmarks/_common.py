@@ -0,0 +1,170 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Los benchmarks corren contra una base SQLite local (o la definida en
+`BENCH_DATABASE_URL`) y nunca contra la base configurada en `.env`.
+Importar este módulo antes que cualquier módulo de `app`/`shared`.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional
+
+_DB_PATH = os.path.join(tempfile.gettempdir(), "rbac_bench.db")
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{_DB_PATH}")
+os.environ.setdefault("TIMEZONE", "America/Lima")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registra todos los modelos)
+from app.roles.infrastructure.role_model import Permission, Role, RolePermission, UserRole  # noqa: E402
+from app.users.infrastructure.user_model import User  # noqa: E402
+from shared.database import engine  # noqa: E402
+
+BATCH = 50_000
+
+
+def reset_schema():
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+
+def timestamps() -> dict:
+    now = datetime.now()
+    return {"created_at": now, "updated_at": now}
+
+
+def seed_rbac(
+    users: int,
+    roles: int,
+    permissions: int,
+    roles_per_user: int,
+    permissions_per_role: int,
+    password_hash: str = "x",
+    seed: int = 42,
+    spread: float = 0.0,
+):
+    """
+    Recrea el esquema y carga un dataset RBAC sintético con inserts
+    multi-fila. Los ids son consecutivos desde 1 en todas las tablas.
+    Con `spread` > 0 la cantidad de roles por usuario y de permisos por rol
+    varía uniformemente en ±spread alrededor del valor indicado.
+    """
+    reset_schema()
+    ts = timestamps()
+    rnd = random.Random(seed)
+    roles_per_user = min(roles_per_user, roles)
+    permissions_per_role = min(permissions_per_role, permissions)
+
+    def count(mean: int, maximum: int) -> int:
+        if not spread:
+            return mean
+        return max(0, min(maximum, round(rnd.uniform(mean * (1 - spread), mean * (1 + spread)))))
+
+    with engine.begin() as conn:
+        conn.execute(insert(Role), [{"id": i, "name": f"role_{i}", "description": None, **ts} for i in range(1, roles + 1)])
+        conn.execute(insert(Permission), [{"id": i, "name": f"perm_{i}", "description": None, **ts} for i in range(1, permissions + 1)])
+        if permissions_per_role:
+            conn.execute(insert(RolePermission), [
+                {"role_id": r, "permission_id": p, **ts}
+                for r in range(1, roles + 1)
+                for p in rnd.sample(range(1, permissions + 1), count(permissions_per_role, permissions))
+            ])
+
+        for start in range(1, users + 1, BATCH):
+            ids = range(start, min(users, start + BATCH - 1) + 1)
+            conn.execute(insert(User), [
+                {"id": i, "email": f"user{i}@bench.local", "password": password_hash, "is_active": True, **ts}
+                for i in ids
+            ])
+            if roles_per_user:
+                conn.execute(insert(UserRole), [
+                    {"user_id": i, "role_id": r, **ts}
+                    for i in ids
+                    for r in rnd.sample(range(1, roles + 1), count(roles_per_user, roles))
+                ])
+
+
+async def asgi_request(
+    asgi_app,
+    method: str,
+    path: str,
+    headers: Optional[dict] = None,
+    body: bytes = b"",
+) -> tuple[int, dict, bytes]:
+    """
+    Ejecuta una petición HTTP directamente contra la app ASGI, sin sockets.
+    Devuelve (status, headers, body).
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": 0, "headers": {}, "body": []}
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await asgi_app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["body"])
+
+
+def percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+    }
+
+
+def timeit(func, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def atimeit(coro_factory, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def fmt_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.3f} ms"
@@ -0,0 +1,89 @@
+"""
+Ráfaga de logins (bcrypt) contra la app ASGI mientras otra tarea consulta
+`GET /roles/` en serie: códigos de respuesta y latencia de los logins, y
+latencia de la ruta barata durante la ráfaga, con y sin control de admisión.
+
+Sin admisión y con sesiones síncronas, una concurrencia mayor que
+DB_POOL_SIZE + DB_MAX_OVERFLOW bloquea el event loop en el checkout del pool
+hasta DB_POOL_TIMEOUT: es el escenario que el límite evita.
+
+Uso:
+    python -m benchmarks.bench_admission --logins 200 --concurrency 50
+    python -m benchmarks.bench_admission --logins 200 --concurrency 50 --no-admission
+"""
+import argparse
+import os
+import sys
+
+if "--no-admission" in sys.argv:
+    os.environ["ADMISSION_CONTROL"] = "false"
+
+import asyncio  # noqa: E402
+import collections  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+
+import bcrypt  # noqa: E402
+
+from benchmarks._common import asgi_request, fmt_ms, percentiles, seed_rbac  # noqa: E402
+
+from app.main import app  # noqa: E402
+from shared.admission import PASSWORD_HASHING, get_admission_stats  # noqa: E402
+from shared.security.password_hasher import password_hasher  # noqa: E402
+
+
+async def run(logins: int, concurrency: int, rounds: int):
+    # Mismo costo que el hash sembrado: el login no re-hashea durante la ráfaga
+    password_hasher.rounds = rounds
+    password_hash = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds)).decode()
+    seed_rbac(users=100, roles=20, permissions=100, roles_per_user=2, permissions_per_role=10, password_hash=password_hash)
+    headers = {"content-type": "application/json"}
+    body = json.dumps({"email": "user1@bench.local", "password": "secret"}).encode()
+
+    statuses: collections.Counter = collections.Counter()
+    login_samples: list[float] = []
+    pending = iter(range(logins))
+
+    async def login_worker():
+        for _ in pending:
+            started = time.perf_counter()
+            status, _, _ = await asgi_request(app, "POST", "/users/login", headers, body)
+            login_samples.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    probe_samples: list[float] = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asgi_request(app, "GET", "/roles/")
+            probe_samples.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    admission = get_admission_stats().get(PASSWORD_HASHING)
+    print(f"{logins} logins, {concurrency} concurrentes, bcrypt cost {rounds}, admisión {'sí' if admission else 'no'}")
+    print(f"  duración: {elapsed:.2f}s  códigos: {dict(sorted(statuses.items()))}")
+    for name, samples in (("login", login_samples), ("GET /roles/", probe_samples)):
+        stats = percentiles(samples)
+        print(f"  {name:<12} p50 {fmt_ms(stats['p50'])}  p95 {fmt_ms(stats['p95'])}  p99 {fmt_ms(stats['p99'])}")
+    if admission:
+        print(f"  admitidos: {admission['admitted']}  rechazados: {admission['shed']}"
+              f"  cola máx.: {admission['max_queue_depth']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="costo bcrypt del hash sembrado")
+    parser.add_argument("--no-admission", action="store_true", help="deshabilitar ADMISSION_CONTROL")
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency, args.rounds))
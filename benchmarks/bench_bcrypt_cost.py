@@ -0,0 +1,38 @@
+"""
+Tiempo de `checkpw` por costo bcrypt en esta CPU y costo que elegiría la
+calibración de arranque para cada objetivo de latencia. Sirve para fijar
+BCRYPT_ROUNDS en despliegues con varios workers o tipos de máquina, y para
+estimar cuántos logins por segundo y núcleo admite cada costo.
+
+Uso:
+    python -m benchmarks.bench_bcrypt_cost --rounds 8,10,11,12,13 --targets 100,250,500
+"""
+import argparse
+
+import bcrypt
+
+from benchmarks._common import fmt_ms, percentiles, timeit
+
+from shared.config import settings
+from shared.security.password_hasher import calibrate_rounds
+
+
+def run(rounds: list[int], targets: list[float], repeat: int):
+    print(f"{'costo':>6} {'mean':>12} {'p95':>12} {'logins/s/núcleo':>16}")
+    for cost in rounds:
+        hashed = bcrypt.hashpw(b"secret", bcrypt.gensalt(cost))
+        stats = percentiles(timeit(lambda: bcrypt.checkpw(b"secret", hashed), max(3, repeat >> max(0, cost - 8))))
+        print(f"{cost:>6} {fmt_ms(stats['mean']):>12} {fmt_ms(stats['p95']):>12} {1 / stats['mean']:>16.1f}")
+    print()
+    for target in targets:
+        chosen = calibrate_rounds(target / 1000, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS)
+        print(f"objetivo {target:>6.0f} ms -> costo {chosen}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", default="8,10,11,12,13")
+    parser.add_argument("--targets", default="100,250,500", help="objetivos en ms")
+    parser.add_argument("--repeat", type=int, default=64, help="repeticiones con costo 8 (se reducen a la mitad por punto)")
+    args = parser.parse_args()
+    run([int(r) for r in args.rounds.split(",")], [float(t) for t in args.targets.split(",")], args.repeat)
@@ -0,0 +1,64 @@
+"""
+Alta de usuarios a través de la app ASGI: N llamadas a `POST /users/` frente
+a `POST /users/bulk` en lotes, con el mismo costo bcrypt. Reporta usuarios
+por segundo y sentencias SQL por usuario.
+
+Con `--rounds` bajo domina el costo de base de datos (consulta, insert,
+commit y refresh por usuario); con el costo real domina bcrypt y la
+diferencia viene de hashear en paralelo en todos los workers del pool.
+
+Uso:
+    python -m benchmarks.bench_bulk_users --users 2000 --batch 1000 --rounds 4
+    python -m benchmarks.bench_bulk_users --users 200 --batch 100 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks._common import asgi_request, reset_schema
+
+from app.main import app
+from shared.database import track_queries
+from shared.security.password_hasher import password_hasher
+
+HEADERS = {"content-type": "application/json"}
+
+
+async def one_by_one(users: list[dict]) -> tuple[float, int]:
+    started = time.perf_counter()
+    with track_queries() as stats:
+        for user in users:
+            status, _, body = await asgi_request(app, "POST", "/users/", HEADERS, json.dumps(user).encode())
+            assert status == 201, body
+    return time.perf_counter() - started, stats.count
+
+
+async def bulk(users: list[dict], batch: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    with track_queries() as stats:
+        for start in range(0, len(users), batch):
+            payload = json.dumps({"users": users[start:start + batch]}).encode()
+            status, _, body = await asgi_request(app, "POST", "/users/bulk", HEADERS, payload)
+            assert status == 201, body
+    return time.perf_counter() - started, stats.count
+
+
+async def run(count: int, batch: int, rounds: int):
+    password_hasher.rounds = rounds
+    print(f"{count} usuarios, lotes de {batch}, bcrypt cost {rounds}, {password_hasher.workers} workers de hashing")
+    print(f"{'modo':<10} {'duración':>10} {'usuarios/s':>11} {'sentencias/usuario':>19}")
+    for name, create in (("uno a uno", one_by_one), ("bulk", lambda users: bulk(users, batch))):
+        reset_schema()
+        users = [{"email": f"user{i}@bench.local", "password": f"secret-{i}"} for i in range(count)]
+        elapsed, statements = await create(users)
+        print(f"{name:<10} {elapsed:>9.2f}s {count / elapsed:>11.1f} {statements / count:>19.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.batch, args.rounds))
@@ -0,0 +1,47 @@
+"""
+Costo de la compresión de respuestas a través de la app ASGI: tamaño en
+bytes y latencia de `GET /users/all` con la página máxima (se serializa y comprime en cada
+request) y de `GET /roles/` (cuerpo serializado y comprimido cacheado por
+versión del catálogo), sin compresión y con cada codec disponible.
+
+Uso:
+    python -m benchmarks.bench_compression --users 10000 --roles 200 --permissions 1000
+"""
+import os
+
+os.environ["RESPONSE_COMPRESSION"] = "true"
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+
+from benchmarks._common import asgi_request, atimeit, fmt_ms, percentiles, seed_rbac  # noqa: E402
+
+from app.main import app  # noqa: E402
+from shared.compression import CODECS  # noqa: E402
+
+
+async def run(users: int, roles: int, permissions: int, repeat: int):
+    seed_rbac(users=users, roles=roles, permissions=permissions, roles_per_user=3, permissions_per_role=20)
+    print(f"{users} usuarios, {roles} roles, {permissions} permisos; codecs: {', '.join(CODECS)}")
+    print(f"{'ruta':<22} {'encoding':>9} {'bytes':>10} {'mean':>12} {'p50':>12} {'p95':>12}")
+    for path, times in (("/users/all?limit=1000", max(3, repeat // 10)), ("/roles/", repeat)):
+        for codec in ("identity", *CODECS):
+            headers = {"accept-encoding": codec}
+            status, response_headers, body = await asgi_request(app, "GET", path, headers)
+            assert status == 200, status
+            assert response_headers.get("content-encoding", "identity") == codec, response_headers
+            stats = percentiles(await atimeit(lambda: asgi_request(app, "GET", path, headers), times))
+            print(
+                f"{path:<22} {codec:>9} {len(body):>10} {fmt_ms(stats['mean']):>12}"
+                f" {fmt_ms(stats['p50']):>12} {fmt_ms(stats['p95']):>12}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=200)
+    parser.add_argument("--permissions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.roles, args.permissions, args.repeat))
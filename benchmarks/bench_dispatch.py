@@ -0,0 +1,87 @@
+"""
+Microbenchmark del overhead de despacho de un caso de uso: flujo genérico
+(`handle_request` resuelto en cada petición) frente al flujo compilado al
+registrar la ruta (`build_pipeline`), y este último con las métricas por
+etapa habilitadas (`measured`). El handler no toca la base de datos.
+
+Uso:
+    python -m benchmarks.bench_dispatch --iterations 20000
+"""
+import argparse
+import asyncio
+
+from benchmarks._common import atimeit, fmt_ms, percentiles
+
+from starlette.requests import Request
+
+from shared.base import BaseUseCaseHandler
+from shared.metrics import request_metrics
+from shared.security.jwt_service import JWTService
+
+
+class NoopService(BaseUseCaseHandler):
+    async def noop(self, request: Request, **kwargs):
+        return self.return_json(est=True, ico="success", msg="ok")
+
+
+SCENARIOS = {
+    "public": {"protected": False},
+    "protected": {
+        "protected": True,
+        "required_roles": ["Administrador", "Supervisor"],
+        "required_permissions": ["user.read", "user.edit"],
+    },
+}
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/noop/1",
+        "path_params": {"id": "1"},
+        "query_string": b"page=2",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+async def run(iterations: int):
+    token = JWTService.create_access_token({
+        "sub": "1", "id": 1, "email": "bench@bench.local",
+        "roles": ["Administrador"], "permisos": ["user.read", "user.edit", "user.create"],
+    })
+    service = NoopService()
+    request = make_request(token)
+
+    print(f"{'scenario':>10} {'dispatch':>10} {'mean':>12} {'p50':>12} {'p99':>12}")
+    for scenario, options in SCENARIOS.items():
+        async def generic():
+            kwargs = {**dict(request.path_params), **dict(request.query_params)}
+            func = getattr(service, "noop")
+            response = await service.handle_request(request=request, handler_func=func, method="GET", **options, **kwargs)
+            assert response.status_code == 200
+
+        request_metrics.enabled = False
+        pipeline = service.build_pipeline(service.noop, method="GET", route="GET /noop/{id}", **options)
+        request_metrics.enabled = True
+        measured_pipeline = service.build_pipeline(service.noop, method="GET", route="GET /noop/{id}", **options)
+
+        async def compiled():
+            response = await pipeline(request, {**request.path_params, **request.query_params})
+            assert response.status_code == 200
+
+        async def measured():
+            response = await measured_pipeline(request, {**request.path_params, **request.query_params})
+            assert response.status_code == 200
+
+        for label, func in (("generic", generic), ("compiled", compiled), ("measured", measured)):
+            await atimeit(func, 500)  # calentamiento
+            stats = percentiles(await atimeit(func, iterations))
+            print(f"{scenario:>10} {label:>10} {fmt_ms(stats['mean']):>12} {fmt_ms(stats['p50']):>12} {fmt_ms(stats['p99']):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
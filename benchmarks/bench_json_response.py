@@ -0,0 +1,102 @@
+"""
+Serialización de la respuesta de `GET /users/all` para una lista de
+usuarios: `JSONResponse` (json stdlib) sobre la proyección en dicts frente al
+encoder de `shared.serialization` (stdlib u orjson), tanto sobre los dicts
+como sobre los DTOs dataclass directamente. Reporta tiempo y pico de memoria
+asignada (tracemalloc) por respuesta.
+
+Uso:
+    python -m benchmarks.bench_json_response --users 10000 --roles-per-user 3 --permissions-per-role 10
+"""
+import argparse
+import tracemalloc
+from datetime import datetime
+
+from benchmarks._common import fmt_ms, percentiles, timeit
+
+from fastapi.responses import JSONResponse
+
+from app.roles.application.role.role_dtos import PermissionDTO
+from app.users.application.user_dtos import RolesDTO, UserWithRolesDTO
+from app.users.application.user_service import UserService
+from shared import serialization
+
+
+def build_users(users: int, roles_per_user: int, permissions_per_role: int) -> list[UserWithRolesDTO]:
+    now = datetime.now()
+    roles = [
+        RolesDTO(
+            id=r,
+            name=f"role_{r}",
+            description=None,
+            permissions=[
+                PermissionDTO(id=r * 100 + p, name=f"perm_{r}_{p}", description=None, created_at=now, updated_at=now)
+                for p in range(permissions_per_role)
+            ],
+            created_at=now,
+            updated_at=now,
+        )
+        for r in range(1, roles_per_user * 4 + 1)
+    ]
+    return [
+        UserWithRolesDTO(
+            id=i,
+            email=f"user{i}@bench.local",
+            roles=[roles[(i + k) % len(roles)] for k in range(roles_per_user)],
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(1, users + 1)
+    ]
+
+
+def envelope(data) -> dict:
+    return {"estado": True, "icono": "success", "message": "Usuarios obtenidos correctamente", "data": data}
+
+
+def peak_allocated(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(users: int, roles_per_user: int, permissions_per_role: int, repeat: int):
+    dtos = build_users(users, roles_per_user, permissions_per_role)
+    project = UserService._user_to_dict
+
+    cases = [
+        ("dicts + JSONResponse", lambda: JSONResponse(envelope([project(u) for u in dtos])).body),
+        ("dicts + stdlib", lambda: serialization.stdlib_dumps(envelope([project(u) for u in dtos]))),
+        ("DTOs + stdlib", lambda: serialization.stdlib_dumps(envelope(dtos))),
+    ]
+    if serialization.orjson is not None:
+        cases += [
+            ("dicts + orjson", lambda: serialization.orjson_dumps(envelope([project(u) for u in dtos]))),
+            ("DTOs + orjson", lambda: serialization.orjson_dumps(envelope(dtos))),
+        ]
+    else:
+        print("orjson no está instalado: solo se miden los caminos stdlib")
+
+    print(f"{users} usuarios, {roles_per_user} roles/usuario, {permissions_per_role} permisos/rol")
+    print(f"{'camino':<22} {'mean':>12} {'p50':>12} {'p95':>12} {'pico mem':>10} {'bytes':>10}")
+    for label, func in cases:
+        size = len(func())
+        stats = percentiles(timeit(func, repeat))
+        peak = peak_allocated(func)
+        print(
+            f"{label:<22} {fmt_ms(stats['mean']):>12} {fmt_ms(stats['p50']):>12} {fmt_ms(stats['p95']):>12}"
+            f" {peak / 2**20:>8.1f}MB {size:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--roles-per-user", type=int, default=3)
+    parser.add_argument("--permissions-per-role", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.users, args.roles_per_user, args.permissions_per_role, args.repeat)
@@ -0,0 +1,58 @@
+"""
+Microbenchmark de `MixinAuth.validate_auth` con y sin la caché de tokens
+verificados de `JWTService`.
+
+Uso:
+    python -m benchmarks.bench_jwt_validation --iterations 20000 --permissions 50
+"""
+import argparse
+import asyncio
+
+from benchmarks._common import atimeit, fmt_ms, percentiles
+
+from starlette.requests import Request
+
+from shared.base import MixinAuth
+from shared.cache import TTLCache
+from shared.security.jwt_service import JWTService
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+async def run(iterations: int, permissions: int, distinct_tokens: int):
+    tokens = [
+        JWTService.create_access_token({
+            "sub": str(i), "id": i, "email": f"user{i}@bench.local",
+            "roles": ["Administrador"],
+            "permisos": [f"module_{p}.action" for p in range(permissions)],
+        })
+        for i in range(distinct_tokens)
+    ]
+    requests = [make_request(t) for t in tokens]
+    auth = MixinAuth()
+    print(f"token: {len(tokens[0])} bytes, {distinct_tokens} tokens distintos, {iterations} validaciones")
+    print(f"{'cache':>8} {'mean':>12} {'p50':>12} {'p99':>12} {'hit rate':>10}")
+
+    for label, max_size in (("off", 0), ("on", 10_000)):
+        JWTService.token_cache = TTLCache(max_size=max_size, ttl_seconds=float("inf"))
+        counter = iter(range(iterations))
+        samples = await atimeit(lambda: auth.validate_auth(requests[next(counter) % distinct_tokens]), iterations)
+        stats = percentiles(samples)
+        hit_rate = JWTService.cache_stats()["hit_rate"]
+        print(f"{label:>8} {fmt_ms(stats['mean']):>12} {fmt_ms(stats['p50']):>12} {fmt_ms(stats['p99']):>12} {hit_rate:>10.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--permissions", type=int, default=50)
+    parser.add_argument("--distinct-tokens", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.permissions, args.distinct_tokens))
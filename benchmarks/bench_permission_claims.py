@@ -0,0 +1,70 @@
+"""
+Compara el claim de permisos como lista de nombres (`permisos`) frente al
+bitmap compacto (`pbm`): tamaño del token y tiempo de validación más
+chequeo de permisos de la ruta (`BaseUseCaseHandler.authorize`).
+
+La caché de tokens verificados se deshabilita para medir el decode completo.
+
+Uso:
+    python -m benchmarks.bench_permission_claims --permissions 500 --granted 200
+"""
+import argparse
+import asyncio
+import random
+
+from benchmarks._common import atimeit, fmt_ms, percentiles
+
+from starlette.requests import Request
+
+from shared.base import BaseUseCaseHandler
+from shared.cache import TTLCache
+from shared.security.jwt_service import JWTService
+from shared.security.permission_registry import (
+    BITMAP_CLAIM, BITMAP_VERSION, BITMAP_VERSION_CLAIM, PermissionMask, encode_bitmap, permission_registry
+)
+
+
+def make_request(token: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+async def run(permissions: int, granted: int, required: int, iterations: int):
+    JWTService.token_cache = TTLCache(max_size=0, ttl_seconds=0)
+    names = {i: f"module_{i // 10}.action_{i % 10}" for i in range(1, permissions + 1)}
+    permission_registry.load((name, i) for i, name in names.items())
+
+    rnd = random.Random(1)
+    granted_ids = rnd.sample(sorted(names), granted)
+    required_names = frozenset(names[i] for i in granted_ids[:required])
+    base = {"sub": "1", "id": 1, "email": "bench@bench.local", "roles": ["Administrador"]}
+    claims = {
+        "list": {**base, "permisos": [names[i] for i in granted_ids]},
+        "bitmap": {**base, BITMAP_CLAIM: encode_bitmap(granted_ids), BITMAP_VERSION_CLAIM: BITMAP_VERSION},
+    }
+
+    handler = BaseUseCaseHandler()
+    mask = PermissionMask(permission_registry, required_names)
+    print(f"{permissions} permisos registrados, {granted} otorgados, {required} requeridos por la ruta")
+    print(f"{'claim':>8} {'token':>10} {'header':>10} {'mean':>12} {'p50':>12} {'p99':>12}")
+    for label, payload in claims.items():
+        token = JWTService.create_access_token(payload)
+        request = make_request(token)
+
+        async def check():
+            result = await handler.authorize(request, None, required_names, mask)
+            assert isinstance(result, dict), result.body
+
+        await atimeit(check, 200)  # calentamiento
+        stats = percentiles(await atimeit(check, iterations))
+        header = len(f"Authorization: Bearer {token}")
+        print(f"{label:>8} {len(token):>8} B {header:>8} B {fmt_ms(stats['mean']):>12} {fmt_ms(stats['p50']):>12} {fmt_ms(stats['p99']):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--permissions", type=int, default=500)
+    parser.add_argument("--granted", type=int, default=200)
+    parser.add_argument("--required", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(run(args.permissions, args.granted, args.required, args.iterations))
@@ -0,0 +1,119 @@
+"""
+Curvas de escalamiento de los servicios de consulta: tiempo y pico de memoria
+(tracemalloc) de `GetUsersWithRolesService` (página y listado completo),
+`GetUserWithRolesService` y `GetRolesWithPermissionsQuery` en cada tamaño
+de dataset (ver `benchmarks.dataset`).
+
+La columna `crec.` es el crecimiento del tiempo frente al paso anterior: con
+los usuarios multiplicados por 10, ~1x indica costo constante (p. ej. búsqueda
+por id con índice) y ~10x costo lineal (listado completo, o un full scan donde
+no debería haberlo).
+
+Uso:
+    python -m benchmarks.bench_query_scaling --steps 1000,10000,100000 --roles 50 --permissions 500
+    python -m benchmarks.bench_query_scaling --steps 1000,10000 --scale-catalog --csv curvas.csv
+"""
+import argparse
+import asyncio
+import csv
+import random
+import tracemalloc
+
+from benchmarks._common import engine, percentiles
+from benchmarks.dataset import DatasetSpec, generate
+
+from sqlmodel import Session
+
+from app.roles.application.role.role_query import GetRolesWithPermissionsQuery
+from app.users.application.user_query import GetUsersWithRolesService, GetUserWithRolesService
+
+PAGE_SIZE = 100
+
+
+def cases(users: int, rnd: random.Random) -> dict:
+    """
+    Consulta -> (función que recibe la sesión, repeticiones relativas).
+    """
+    return {
+        "users_page": (lambda s: GetUsersWithRolesService(s).execute(limit=PAGE_SIZE), 1.0),
+        "users_all": (lambda s: GetUsersWithRolesService(s).execute(), 0.05),
+        "user_by_id": (lambda s: GetUserWithRolesService(s).execute(rnd.randint(1, users)), 1.0),
+        "roles": (lambda s: GetRolesWithPermissionsQuery(s).execute(), 0.5),
+    }
+
+
+def measure(query, repeat: int) -> tuple[dict, int]:
+    async def once():
+        # Sesión nueva por ejecución: sin identity map caliente entre corridas
+        with Session(engine) as session:
+            await query(session)
+
+    async def timed() -> list[float]:
+        loop = asyncio.get_running_loop()
+        samples = []
+        for _ in range(repeat):
+            start = loop.time()
+            await once()
+            samples.append(loop.time() - start)
+        return samples
+
+    samples = asyncio.run(timed())
+    tracemalloc.start()
+    try:
+        asyncio.run(once())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return percentiles(samples), peak
+
+
+def run(base: DatasetSpec, steps: list[int], scale_catalog: bool, repeat: int, csv_path: str):
+    rows = []
+    previous: dict = {}
+    print(f"densidad: {base.user_role_density:.0%} roles/usuario, {base.role_permission_density:.0%} permisos/rol")
+    print(f"{'usuarios':>10} {'roles':>6} {'consulta':>11} {'mean':>11} {'p95':>11} {'crec.':>7} {'pico mem':>10}")
+    for users in steps:
+        spec = base.scaled(users, scale_catalog)
+        generate(spec)
+        rnd = random.Random(7)
+        for name, (query, weight) in cases(users, rnd).items():
+            stats, peak = measure(query, max(3, int(repeat * weight)))
+            growth = stats["mean"] / previous[name] if name in previous else None
+            previous[name] = stats["mean"]
+            rows.append({
+                "users": users, "roles": spec.roles, "permissions": spec.permissions, "query": name,
+                "mean_s": stats["mean"], "p95_s": stats["p95"], "peak_bytes": peak,
+            })
+            print(
+                f"{users:>10} {spec.roles:>6} {name:>11} {stats['mean'] * 1000:>8.2f} ms {stats['p95'] * 1000:>8.2f} ms"
+                f" {(f'{growth:.1f}x' if growth else '-'):>7} {peak / 2**20:>8.2f}MB"
+            )
+
+    if csv_path:
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"curvas guardadas en {csv_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", default="1000,10000,100000", help="cantidades de usuarios")
+    parser.add_argument("--roles", type=int, default=50)
+    parser.add_argument("--permissions", type=int, default=500)
+    parser.add_argument("--user-role-density", type=float, default=0.1)
+    parser.add_argument("--role-permission-density", type=float, default=0.05)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--scale-catalog", action="store_true", help="escalar roles y permisos junto con los usuarios")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--csv", default="")
+    args = parser.parse_args()
+
+    steps = [int(s) for s in args.steps.split(",")]
+    base = DatasetSpec(
+        users=steps[0], roles=args.roles, permissions=args.permissions,
+        user_role_density=args.user_role_density, role_permission_density=args.role_permission_density,
+        spread=args.spread,
+    )
+    run(base, steps, args.scale_catalog, args.repeat, args.csv)
@@ -0,0 +1,46 @@
+"""
+Latencia de `GetUserWithRolesService.execute` según el tamaño de `user_roles`.
+
+Uso:
+    python -m benchmarks.bench_user_query --sizes 10000,100000,1000000
+"""
+import argparse
+import asyncio
+import random
+
+from benchmarks._common import atimeit, engine, fmt_ms, percentiles, seed_rbac
+
+from sqlmodel import Session
+
+from app.users.application.user_query import GetUserWithRolesService
+
+ROLES = 50
+PERMISSIONS = 200
+PERMISSIONS_PER_ROLE = 10
+ROLES_PER_USER = 5
+
+
+def seed(user_roles_rows: int) -> int:
+    users = max(1, user_roles_rows // ROLES_PER_USER)
+    seed_rbac(users, ROLES, PERMISSIONS, ROLES_PER_USER, PERMISSIONS_PER_ROLE)
+    return users
+
+
+def run(sizes: list[int], repeat: int):
+    print(f"{'user_roles':>12} {'users':>10} {'mean':>12} {'p50':>12} {'p95':>12} {'p99':>12}")
+    for size in sizes:
+        users = seed(size)
+        rnd = random.Random(7)
+        with Session(engine) as session:
+            service = GetUserWithRolesService(session)
+            samples = asyncio.run(atimeit(lambda: service.execute(rnd.randint(1, users)), repeat))
+            stats = percentiles(samples)
+        print(f"{size:>12} {users:>10} " + " ".join(f"{fmt_ms(stats[k]):>12}" for k in ("mean", "p50", "p95", "p99")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.repeat)
@@ -0,0 +1,84 @@
+"""
+Presupuesto de consultas SQL por endpoint. Carga un dataset RBAC sintético,
+llama a cada endpoint vía ASGI dentro de `track_queries()` y falla (exit 1)
+si alguno supera su presupuesto o repite la misma forma de sentencia más de
+`--repeat-threshold` veces (posible N+1). El presupuesto no depende del
+tamaño del dataset: correrlo con distintos `--users` detecta consultas por fila.
+
+Uso:
+    python -m benchmarks.check_query_budget --users 2000
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks._common import asgi_request, seed_rbac
+
+import bcrypt
+
+from app.main import app
+from shared.database import track_queries
+from shared.security.jwt_service import JWTService
+from shared.security.password_hasher import password_hasher
+
+PASSWORD = "bench-password"
+ROUNDS = 4
+# Se reemplaza por un refresh token emitido por login antes de medir
+REFRESH_TOKEN = "<refresh_token>"
+
+# (método, ruta, body, autenticado, máximo de sentencias)
+BUDGETS = [
+    # Sin `limit` el listado se lee en bloques de USERS_STREAM_CHUNK_SIZE (3 por bloque,
+    # como NDJSON): se mide la página máxima, que no depende del tamaño del dataset.
+    # Una sentencia más lee la versión del ETag (`data_versions`)
+    ("GET", "/users/all?limit=1000", None, False, 4),
+    ("GET", "/users/all?limit=100", None, False, 4),
+    ("GET", "/users/1", None, True, 1),
+    ("GET", "/roles/", None, False, 1),
+    ("GET", "/permissions/", None, False, 1),
+    # Usuario y versión RBAC efectiva; los permisos salen de la caché
+    ("POST", "/users/login", {"email": "user1@bench.local", "password": PASSWORD}, False, 2),
+    # Sin cambios de roles/permisos: solo se lee la versión RBAC efectiva
+    ("POST", "/users/refresh", {"refresh_token": REFRESH_TOKEN}, False, 1),
+]
+
+
+async def run(users: int, repeat_threshold: int) -> bool:
+    # Mismo costo que el hash sembrado: el login no re-hashea
+    password_hasher.rounds = ROUNDS
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(ROUNDS)).decode()
+    seed_rbac(users=users, roles=20, permissions=200, roles_per_user=3, permissions_per_role=15, password_hash=password_hash)
+    token = JWTService.create_access_token({"sub": "1", "id": 1, "email": "user1@bench.local", "roles": ["Administrador"]})
+    login = json.dumps({"email": "user1@bench.local", "password": PASSWORD}).encode()
+    _, _, login_body = await asgi_request(app, "POST", "/users/login", {"content-type": "application/json"}, login)
+    refresh_token = json.loads(login_body)["data"]["refresh_token"]
+
+    ok = True
+    print(f"{users} usuarios")
+    print(f"{'endpoint':<28} {'status':>6} {'sentencias':>10} {'máximo':>7} {'db':>10}")
+    for method, path, body, authenticated, budget in BUDGETS:
+        headers = {"content-type": "application/json"}
+        if authenticated:
+            headers["authorization"] = f"Bearer {token}"
+        payload = json.dumps(body).replace(REFRESH_TOKEN, refresh_token).encode() if body is not None else b""
+        with track_queries() as stats:
+            status, _, _ = await asgi_request(app, method, path, headers, payload)
+        repeated = stats.repeated(repeat_threshold)
+        passed = status < 500 and stats.count <= budget and not repeated
+        ok &= passed
+        print(
+            f"{method + ' ' + path:<28} {status:>6} {stats.count:>10} {budget:>7}"
+            f" {stats.total_seconds * 1000:>7.2f} ms {'' if passed else 'FALLA'}"
+        )
+        for shape, times in repeated.items():
+            print(f"    repetida {times}x: {shape[:120]}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--repeat-threshold", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.users, args.repeat_threshold)) else 1)
@@ -0,0 +1,103 @@
+"""
+Generador de datasets RBAC sintéticos: N usuarios, M roles, P permisos y
+densidad de asignación configurable, cargados en bloque sobre la base de
+benchmarks (ver `benchmarks._common`).
+
+La densidad es la fracción del catálogo asignada en promedio: con 50 roles y
+`--user-role-density 0.1` cada usuario recibe ~5 roles; `--spread` hace variar
+esa cantidad por fila (0.5 = ±50 %).
+
+Uso:
+    python -m benchmarks.dataset --users 100000 --roles 50 --permissions 500 \\
+        --user-role-density 0.1 --role-permission-density 0.05 --spread 0.5
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+from benchmarks._common import engine, seed_rbac
+
+from sqlalchemy import func, select
+
+from app.roles.infrastructure.role_model import Permission, Role, RolePermission, UserRole
+from app.users.infrastructure.user_model import User
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int
+    roles: int
+    permissions: int
+    user_role_density: float = 0.1
+    role_permission_density: float = 0.05
+    spread: float = 0.0
+    seed: int = 42
+
+    @property
+    def roles_per_user(self) -> int:
+        return min(self.roles, max(1 if self.roles else 0, round(self.roles * self.user_role_density)))
+
+    @property
+    def permissions_per_role(self) -> int:
+        return min(self.permissions, max(1 if self.permissions else 0, round(self.permissions * self.role_permission_density)))
+
+    def scaled(self, users: int, scale_catalog: bool = False) -> "DatasetSpec":
+        """
+        Mismo dataset con otra cantidad de usuarios; con `scale_catalog` roles
+        y permisos crecen en la misma proporción.
+        """
+        factor = users / self.users if self.users else 1
+        return DatasetSpec(
+            users=users,
+            roles=max(1, round(self.roles * factor)) if scale_catalog else self.roles,
+            permissions=max(1, round(self.permissions * factor)) if scale_catalog else self.permissions,
+            user_role_density=self.user_role_density,
+            role_permission_density=self.role_permission_density,
+            spread=self.spread,
+            seed=self.seed,
+        )
+
+
+def generate(spec: DatasetSpec, password_hash: str = "x") -> dict:
+    """
+    Recrea el esquema, carga el dataset y devuelve las filas por tabla.
+    """
+    seed_rbac(
+        users=spec.users,
+        roles=spec.roles,
+        permissions=spec.permissions,
+        roles_per_user=spec.roles_per_user,
+        permissions_per_role=spec.permissions_per_role,
+        password_hash=password_hash,
+        seed=spec.seed,
+        spread=spec.spread,
+    )
+    with engine.connect() as conn:
+        return {
+            model.__tablename__: conn.execute(select(func.count()).select_from(model)).scalar_one()
+            for model in (User, Role, Permission, UserRole, RolePermission)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=50)
+    parser.add_argument("--permissions", type=int, default=500)
+    parser.add_argument("--user-role-density", type=float, default=0.1)
+    parser.add_argument("--role-permission-density", type=float, default=0.05)
+    parser.add_argument("--spread", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(
+        users=args.users, roles=args.roles, permissions=args.permissions,
+        user_role_density=args.user_role_density, role_permission_density=args.role_permission_density,
+        spread=args.spread, seed=args.seed,
+    )
+    start = time.perf_counter()
+    rows = generate(spec)
+    elapsed = time.perf_counter() - start
+    print(f"{spec.roles_per_user} roles/usuario, {spec.permissions_per_role} permisos/rol (media), {elapsed:.2f} s")
+    for table, count in rows.items():
+        print(f"{table:>18} {count:>12}")
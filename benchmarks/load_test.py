@@ -0,0 +1,276 @@
+"""
+Prueba de carga HTTP de los endpoints de autenticación y RBAC.
+
+Carga un dataset sintético en la base de benchmarks, levanta
+`app.main:app` con uvicorn en un subproceso y lo ataca por HTTP real
+(conexiones keep-alive, un cliente por nivel de concurrencia). Reporta
+throughput y latencia p50/p95/p99 por escenario y concurrencia.
+
+Con `--save-baseline` guarda los resultados; con `--baseline` compara contra
+un archivo guardado y termina con código 1 si algún escenario pierde más de
+`--threshold` de throughput o sube su p95 en más de ese margen.
+
+Uso:
+    python -m benchmarks.load_test --concurrency 1,16,64 --duration 5 --save-baseline baseline.json
+    python -m benchmarks.load_test --concurrency 1,16,64 --duration 5 --baseline baseline.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from benchmarks._common import percentiles, seed_rbac
+
+from sqlalchemy import insert, select, update
+
+from app.roles.infrastructure.role_model import Role, UserRole
+from shared.base import hash_password
+from shared.database import engine
+
+PASSWORD = "bench-password"
+ADMIN_ROLE = "Administrador"
+
+# Petición: (método, ruta, body JSON o None, con token)
+RequestSpec = Tuple[str, str, Optional[dict], bool]
+
+
+def build_scenarios(users: int, refresh_token: str) -> Dict[str, Callable[[int], RequestSpec]]:
+    """
+    Escenario -> función que arma la i-ésima petición.
+    """
+    return {
+        "login": lambda i: ("POST", "/users/login", {"email": f"user{i % users + 1}@bench.local", "password": PASSWORD}, False),
+        "refresh": lambda i: ("POST", "/users/refresh", {"refresh_token": refresh_token}, False),
+        "user": lambda i: ("GET", f"/users/{i % users + 1}", None, True),
+        "users_all": lambda i: ("GET", "/users/all", None, False),
+        "roles": lambda i: ("GET", "/roles/", None, False),
+        "permissions": lambda i: ("GET", "/permissions/", None, False),
+    }
+
+
+def seed(users: int, roles: int, permissions: int, roles_per_user: int, permissions_per_role: int):
+    """
+    Dataset sintético; el rol 1 pasa a ser `Administrador` y se asigna al
+    usuario 1, cuyo token se usa en las rutas protegidas.
+    """
+    seed_rbac(
+        users=users, roles=roles, permissions=permissions,
+        roles_per_user=roles_per_user, permissions_per_role=permissions_per_role,
+        password_hash=hash_password(PASSWORD),
+    )
+    with engine.begin() as conn:
+        conn.execute(update(Role).where(Role.id == 1).values(name=ADMIN_ROLE))
+        assigned = conn.execute(select(UserRole).where(UserRole.user_id == 1, UserRole.role_id == 1)).first()
+        if not assigned:
+            conn.execute(insert(UserRole).values(user_id=1, role_id=1))
+
+
+class HTTPClient:
+    """
+    Cliente HTTP/1.1 mínimo sobre una conexión keep-alive (solo respuestas
+    con Content-Length, que es lo que devuelven estos endpoints).
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None, token: Optional[str] = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("conexión cerrada por el servidor")
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                close = True
+        data = await self.reader.readexactly(length)
+        if close:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn terminó antes de aceptar conexiones")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn no respondió en 30 s")
+
+
+async def login(host: str, port: int) -> Tuple[str, str]:
+    client = HTTPClient(host, port)
+    status, body = await client.request("POST", "/users/login", {"email": "user1@bench.local", "password": PASSWORD})
+    await client.close()
+    if status != 200:
+        raise RuntimeError(f"login del usuario de benchmark falló: {status} {body[:200]!r}")
+    data = json.loads(body)["data"]
+    return data["access_token"], data["refresh_token"]
+
+
+async def drive(host: str, port: int, build: Callable[[int], RequestSpec], token: str, concurrency: int, duration: float) -> dict:
+    samples: list[float] = []
+    errors = 0
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        client = HTTPClient(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                method, path, body, auth = build(next(counter))
+                start = time.perf_counter()
+                try:
+                    status, _ = await client.request(method, path, body, token if auth else None)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    errors += 1
+                    await client.close()
+                    continue
+                samples.append(time.perf_counter() - start)
+                if status >= 400:
+                    errors += 1
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if not samples:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    stats = percentiles(samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / elapsed,
+        "p50": stats["p50"],
+        "p95": stats["p95"],
+        "p99": stats["p99"],
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Regresiones frente al baseline: throughput por debajo de (1 - threshold)
+    o p95 por encima de (1 + threshold).
+    """
+    regressions = []
+    for scenario, by_concurrency in results.items():
+        for concurrency, current in by_concurrency.items():
+            base = baseline.get(scenario, {}).get(concurrency)
+            if not base:
+                continue
+            if current["rps"] < base["rps"] * (1 - threshold):
+                regressions.append(f"{scenario} c={concurrency}: {current['rps']:.0f} req/s vs {base['rps']:.0f} del baseline")
+            if current["p95"] > base["p95"] * (1 + threshold):
+                regressions.append(f"{scenario} c={concurrency}: p95 {current['p95'] * 1000:.2f} ms vs {base['p95'] * 1000:.2f} ms del baseline")
+    return regressions
+
+
+async def run(args) -> int:
+    host, port = "127.0.0.1", args.port or free_port()
+    seed(args.users, args.roles, args.permissions, args.roles_per_user, args.permissions_per_role)
+    server = start_server(port, args.server_workers)
+    try:
+        access_token, refresh_token = await login(host, port)
+        scenarios = build_scenarios(args.users, refresh_token)
+        selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise SystemExit(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+        results: dict = {}
+        print(f"{args.users} usuarios, {args.duration:.0f} s por medición, servidor en :{port}")
+        print(f"{'escenario':<12} {'conc':>5} {'req/s':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'errores':>8}")
+        for scenario in selected:
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                await drive(host, port, scenarios[scenario], access_token, concurrency, min(1.0, args.duration))  # calentamiento
+                r = await drive(host, port, scenarios[scenario], access_token, concurrency, args.duration)
+                results.setdefault(scenario, {})[str(concurrency)] = r
+                print(
+                    f"{scenario:<12} {concurrency:>5} {r['rps']:>10.1f} {r['p50'] * 1000:>8.2f}ms"
+                    f" {r['p95'] * 1000:>8.2f}ms {r['p99'] * 1000:>8.2f}ms {r['errors']:>8}"
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline guardado en {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nRegresiones (umbral {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nsin regresiones frente a {args.baseline} (umbral {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos por escenario y concurrencia")
+    parser.add_argument("--scenarios", default="", help="login,refresh,user,users_all,roles,permissions (por defecto todos)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--roles", type=int, default=20)
+    parser.add_argument("--permissions", type=int, default=200)
+    parser.add_argument("--roles-per-user", type=int, default=3)
+    parser.add_argument("--permissions-per-role", type=int, default=15)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--baseline", help="archivo de baseline contra el cual comparar")
+    parser.add_argument("--save-baseline", help="archivo donde guardar los resultados como baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from .concurrency import LoopSemaphore
+from .config import settings
+from .metrics import Histogram, _labels, format_histogram
+
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+# Limitador compartido por las rutas que ejecutan bcrypt
+PASSWORD_HASHING = "password_hashing"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ConcurrencyLimit:
+    """
+    Límite de concurrencia de una ruta (ver `add_use_case(limit=...)`).
+    - `name`: las rutas con el mismo nombre comparten un único limitador
+      (sin nombre, cada ruta tiene el suyo).
+    - `max_concurrency`: requests ejecutándose a la vez.
+    - `max_queue`: requests esperando turno; con la cola llena se rechaza al instante.
+    - `queue_timeout`: espera máxima en cola antes de rechazar.
+    - `status_code` / `retry_after`: respuesta de rechazo (503 o 429) y su `Retry-After`.
+    """
+    max_concurrency: int
+    max_queue: int = 0
+    queue_timeout: float = 1.0
+    status_code: int = 503
+    retry_after: int = 1
+    name: Optional[str] = None
+
+    @classmethod
+    def for_password_hashing(cls) -> Optional["ConcurrencyLimit"]:
+        """
+        Límite por defecto de las rutas que ejecutan bcrypt, según `Settings`
+        (None si `ADMISSION_CONTROL` está deshabilitado), compartido por todas
+        ellas. Sin valor explícito, la concurrencia es el doble de los trabajos
+        que admite el pool de hashing (uno en bcrypt y otro en su consulta a
+        la base), sin superar las conexiones del pool de base de datos.
+        """
+        if not settings.ADMISSION_CONTROL:
+            return None
+        from .security.password_hasher import password_hasher
+        pool_capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        return cls(
+            name=PASSWORD_HASHING,
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY or min(2 * password_hasher.max_in_flight, pool_capacity),
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            status_code=settings.ADMISSION_SHED_STATUS,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        )
+
+
+class AdmissionRejected(Exception):
+    """
+    Rechazo del control de admisión dentro de un handler (ver
+    `ConcurrencyLimiter.run`); se responde igual que el rechazo de una ruta.
+    """
+
+    def __init__(self, limit: ConcurrencyLimit, reason: str):
+        super().__init__(reason)
+        self.limit = limit
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    Control de admisión de una ruta (o de un grupo de rutas con el mismo
+    `ConcurrencyLimit.name`): semáforo de `max_concurrency` con una
+    cola acotada delante. `acquire()` devuelve None si el request entra o
+    el motivo del rechazo (`queue_full`, `queue_timeout`); rechazar rápido
+    mantiene la latencia del resto de rutas cuando esta se satura.
+    """
+
+    def __init__(self, route: str, limit: ConcurrencyLimit):
+        if limit.max_concurrency < 1:
+            raise ValueError(f"max_concurrency debe ser >= 1 en {route}")
+        self.route = route
+        self.limit = limit
+        self._semaphore = LoopSemaphore(limit.max_concurrency)
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {QUEUE_FULL: 0, QUEUE_TIMEOUT: 0}
+        self.queue_wait = Histogram()
+
+    async def acquire(self) -> Optional[str]:
+        semaphore = self._semaphore.get()
+        if semaphore.locked():
+            if self.queue_depth >= self.limit.max_queue:
+                self.shed[QUEUE_FULL] += 1
+                return QUEUE_FULL
+            started = time.perf_counter()
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.limit.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed[QUEUE_TIMEOUT] += 1
+                return QUEUE_TIMEOUT
+            finally:
+                self.queue_depth -= 1
+                self.queue_wait.observe(time.perf_counter() - started)
+        else:
+            await semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.get().release()
+
+    async def run(self, func: Callable[..., Awaitable[T]], *args) -> T:
+        """
+        Ejecuta `func(*args)` con un turno propio, para trabajos que un mismo
+        request reparte en varias unidades; sin turno lanza `AdmissionRejected`.
+        """
+        rejected = await self.acquire()
+        if rejected is not None:
+            raise AdmissionRejected(self.limit, rejected)
+        try:
+            return await func(*args)
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.limit.max_concurrency,
+            "max_queue": self.limit.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def concurrency_limiter(route: str, limit: ConcurrencyLimit) -> ConcurrencyLimiter:
+    """
+    Crea y registra el limitador de una ruta para exportar sus métricas. Con
+    `limit.name` devuelve el limitador ya registrado con ese nombre, si existe.
+    """
+    key = limit.name or route
+    with _limiters_lock:
+        limiter = _limiters.get(key) if limit.name else None
+        if limiter is None:
+            limiter = _limiters[key] = ConcurrencyLimiter(key, limit)
+    return limiter
+
+
+def password_hashing_limiter() -> Optional[ConcurrencyLimiter]:
+    """
+    Limitador compartido de las rutas de bcrypt (None si `ADMISSION_CONTROL`
+    está deshabilitado).
+    """
+    limit = ConcurrencyLimit.for_password_hashing()
+    return concurrency_limiter(PASSWORD_HASHING, limit) if limit else None
+
+
+def get_admission_stats() -> Dict[str, Dict[str, Any]]:
+    return {route: limiter.stats() for route, limiter in _limiters.items()}
+
+
+def render_admission_metrics() -> List[str]:
+    """
+    Profundidad de cola, concurrencia, rechazos y espera en cola por ruta
+    limitada, en formato Prometheus. Un límite compartido aparece con su
+    nombre en la etiqueta `route` (p. ej. `password_hashing`).
+    """
+    limiters = sorted(_limiters.items())
+    lines = [
+        "# HELP http_admission_queue_depth Requests esperando turno por ruta.",
+        "# TYPE http_admission_queue_depth gauge",
+    ]
+    lines += [f"http_admission_queue_depth{_labels({'route': r})} {l.queue_depth}" for r, l in limiters]
+    lines += [
+        "# HELP http_admission_in_flight Requests en ejecución por ruta.",
+        "# TYPE http_admission_in_flight gauge",
+    ]
+    lines += [f"http_admission_in_flight{_labels({'route': r})} {l.in_flight}" for r, l in limiters]
+    lines += [
+        "# HELP http_admission_limit Concurrencia máxima configurada por ruta.",
+        "# TYPE http_admission_limit gauge",
+    ]
+    lines += [f"http_admission_limit{_labels({'route': r})} {l.limit.max_concurrency}" for r, l in limiters]
+    lines += [
+        "# HELP http_admission_admitted_total Requests admitidos por ruta.",
+        "# TYPE http_admission_admitted_total counter",
+    ]
+    lines += [f"http_admission_admitted_total{_labels({'route': r})} {l.admitted}" for r, l in limiters]
+    lines += [
+        "# HELP http_admission_shed_total Requests rechazados por ruta y motivo.",
+        "# TYPE http_admission_shed_total counter",
+    ]
+    for route, limiter in limiters:
+        for reason, count in limiter.shed.items():
+            lines.append(f"http_admission_shed_total{_labels({'route': route, 'reason': reason})} {count}")
+    lines += [
+        "# HELP http_admission_queue_wait_seconds Espera en cola por ruta.",
+        "# TYPE http_admission_queue_wait_seconds histogram",
+    ]
+    for route, limiter in limiters:
+        lines += format_histogram("http_admission_queue_wait_seconds", {"route": route}, limiter.queue_wait)
+    return lines
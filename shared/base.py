@@ -1,15 +1,50 @@
 import bcrypt
 from fastapi import APIRouter, Request
 from pydantic import ValidationError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlmodel import SQLModel, Field
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, List, Optional, Type, Union
 from .utils import get_hora_peru
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.encoders import jsonable_encoder
-from .database import in_transaction, simple_session, get_session
+from .database import in_transaction, simple_session, get_session, maybe_await
+from .metrics import request_metrics, start_render_timer, render_timer, stop_render_timer
+from .admission import AdmissionRejected, ConcurrencyLimit, ConcurrencyLimiter, concurrency_limiter
+from .compression import IDENTITY, add_vary, compress_response, response_body_cache
+from .config import settings
+from .serialization import FastJSONResponse, RenderedJSONResponse, json_dumps
 from .security.jwt_service import JWTService
+from .security.password_hasher import password_hasher
+from .security.permission_registry import (
+    BITMAP_CLAIM, BITMAP_VERSION, BITMAP_VERSION_CLAIM, PermissionMask, decode_bitmap, permission_registry
+)
 import inspect
+import time
+
+WRITE_METHODS = frozenset({"POST", "PUT", "DELETE", "PATCH"})
+FULL_ACCESS_PERMISSION = "admin.full_access"
+
+# Fuente de versión de un GET con ETag: recibe (request, **kwargs) y devuelve
+# un str (o awaitable de str) que cambia cuando cambian los datos
+EtagSource = Callable[..., Any]
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Comparación débil de `If-None-Match` (RFC 9110): devuelve la etiqueta del
+    cliente que coincide con `etag` (tal como la recibió: fuerte, o débil si
+    la respuesta iba comprimida), o None.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    opaque = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.removeprefix("W/") == opaque:
+            return tag
+    return None
 
 class BaseModel(SQLModel):
     created_at: datetime = Field(default_factory=get_hora_peru, nullable=False)
@@ -26,10 +61,15 @@ class MixinResponse:
         ico: str = "",
         msg: str = "",
         data: Any = None,
-        status_code: int = 200
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        cache_key: Optional[Hashable] = None
     ):
         """
-        Devuelve un JSONResponse estándar con serialización automática.
+        Devuelve la respuesta JSON estándar. `data` puede incluir DTOs
+        dataclass y datetimes: el encoder rápido los serializa directamente.
+        Con `cache_key` (que debe incluir la versión de los datos) el cuerpo
+        serializado y sus versiones comprimidas se reutilizan entre requests.
         """
         content = {
             "estado": est,
@@ -37,7 +77,18 @@ class MixinResponse:
             "message": msg,
             "data": data
         }
-        return JSONResponse(content=content, status_code=status_code)
+        if cache_key is None:
+            return FastJSONResponse(content=content, status_code=status_code, headers=headers)
+        body = response_body_cache.get(cache_key, IDENTITY)
+        if body is None:
+            body = json_dumps(content)
+            response_body_cache.set(cache_key, IDENTITY, body)
+        response = RenderedJSONResponse(content=body, status_code=status_code, headers=headers)
+        response.cache_key = cache_key
+        return response
+
+    def not_modified(self, etag: str) -> Response:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 class MixinTryExcept(MixinResponse):
     async def try_except(self, func, **kwargs):
@@ -47,27 +98,50 @@ class MixinTryExcept(MixinResponse):
             return func(**kwargs)
 
         except Exception as e:
-            # Aquí luego puedes inyectar logger
+            return self.exception_response(e)
+
+    def shed_response(self, limit: ConcurrencyLimit):
+        return self.return_json(
+            est=False,
+            ico="error",
+            msg="Servicio temporalmente saturado, intente nuevamente.",
+            status_code=limit.status_code,
+            headers={"Retry-After": str(limit.retry_after)},
+        )
+
+    def exception_response(self, e: Exception):
+        # Aquí luego puedes inyectar logger
+        if isinstance(e, PoolTimeoutError):
+            # Pool de conexiones agotado: fallar rápido para que el cliente reintente
             return self.return_json(
                 est=False,
                 ico="error",
-                msg=str(e),
-                status_code=500,
+                msg="Servicio temporalmente saturado, intente nuevamente.",
+                status_code=503,
+                headers={"Retry-After": "1"},
             )
+        if isinstance(e, AdmissionRejected):
+            return self.shed_response(e.limit)
+        return self.return_json(
+            est=False,
+            ico="error",
+            msg=str(e),
+            status_code=500,
+        )
 
 class MixinTransaction(MixinTryExcept): 
-    async def execute(self, func, *, method: str = "GET", **kwargs):
+    async def execute(self, func, *, method: str = "GET", use_primary: bool = False, **kwargs):
 
         method = method.upper()
 
         async def logic_wrapper():
-            if method in ["POST", "PUT", "DELETE", "PATCH"]:
+            if method in WRITE_METHODS:
                 async with in_transaction():
                     if inspect.iscoroutinefunction(func):
                         return await func(**kwargs)
                     return func(**kwargs)
             else:
-                async with simple_session():
+                async with simple_session(use_primary=use_primary):
                     if inspect.iscoroutinefunction(func):
                         return await func(**kwargs)
                     return func(**kwargs)
@@ -147,6 +221,62 @@ class BaseUseCaseHandler(MixinTransaction, MixinValidadorPydantic, MixinAuth):
     def session(self):
         return get_session()
 
+    async def authorize(
+        self,
+        request: Request,
+        required_roles: Optional[FrozenSet[str]] = None,
+        required_permissions: Optional[FrozenSet[str]] = None,
+        permission_mask: Optional[PermissionMask] = None
+    ) -> Union[Dict[str, Any], JSONResponse]:
+        """
+        Valida el token y los roles/permisos requeridos.
+        Devuelve el payload del usuario o el JSONResponse de error.
+        - Si el token trae el bitmap compacto (`pbm`), los permisos se
+          comparan con operaciones de bits contra la máscara de la ruta.
+        """
+        auth_result = await self.validate_auth(request)
+        if isinstance(auth_result, JSONResponse):
+            return auth_result
+        return await self.check_access(auth_result, required_roles, required_permissions, permission_mask)
+
+    async def check_access(
+        self,
+        auth_result: Dict[str, Any],
+        required_roles: Optional[FrozenSet[str]] = None,
+        required_permissions: Optional[FrozenSet[str]] = None,
+        permission_mask: Optional[PermissionMask] = None
+    ) -> Union[Dict[str, Any], JSONResponse]:
+        """
+        Compara roles/permisos del payload ya validado con los requeridos.
+        """
+        if required_roles and required_roles.isdisjoint(auth_result.get("roles", ())):
+            return self.return_json(
+                est=False,
+                ico="error",
+                msg="No tiene el rol necesario para acceder a este recurso.",
+                status_code=403
+            )
+
+        if required_permissions:
+            if auth_result.get(BITMAP_CLAIM) is not None:
+                permission_mask = permission_mask or PermissionMask(permission_registry, required_permissions)
+                allowed = (
+                    auth_result.get(BITMAP_VERSION_CLAIM) == BITMAP_VERSION
+                    and await permission_mask.allows(decode_bitmap(auth_result[BITMAP_CLAIM]), FULL_ACCESS_PERMISSION)
+                )
+            else:
+                user_permissions = frozenset(auth_result.get("permisos", ()))
+                allowed = FULL_ACCESS_PERMISSION in user_permissions or required_permissions <= user_permissions
+            if not allowed:
+                return self.return_json(
+                    est=False,
+                    ico="error",
+                    msg="No tiene los permisos necesarios para esta acción.",
+                    status_code=403
+                )
+
+        return auth_result
+
     async def handle_request(
         self, 
         request: Request, 
@@ -156,38 +286,23 @@ class BaseUseCaseHandler(MixinTransaction, MixinValidadorPydantic, MixinAuth):
         protected: bool = False,
         required_permissions: Optional[List[str]] = None,
         required_roles: Optional[List[str]] = None,
+        use_primary: bool = False,
         **kwargs
     ):
+        """
+        Orquestación genérica, resuelta en cada petición.
+        Las rutas registradas con `add_use_case` usan `build_pipeline`.
+        """
         # 1. Autenticación
         if protected:
-            auth_result = await self.validate_auth(request)
+            auth_result = await self.authorize(
+                request,
+                frozenset(required_roles) if required_roles else None,
+                frozenset(required_permissions) if required_permissions else None
+            )
             if isinstance(auth_result, JSONResponse):
                 return auth_result
-            
-            user_auth = auth_result
-            kwargs["user_auth"] = user_auth
-
-            user_roles = set(user_auth.get("roles", []))
-            user_permissions = set(user_auth.get("permisos", []))
-
-            if required_roles:
-                if not user_roles.intersection(required_roles):
-                    return self.return_json(
-                        est=False,
-                        ico="error",
-                        msg="No tiene el rol necesario para acceder a este recurso.",
-                        status_code=403
-                    )
-                    
-            if required_permissions:
-                if "admin.full_access" not in user_permissions:
-                    if not set(required_permissions).issubset(user_permissions):
-                        return self.return_json(
-                            est=False,
-                            ico="error",
-                            msg="No tiene los permisos necesarios para esta acción.",
-                            status_code=403
-                        )
+            kwargs["user_auth"] = auth_result
 
         # 4. Validar body si hay schema
         if schema:
@@ -198,9 +313,213 @@ class BaseUseCaseHandler(MixinTransaction, MixinValidadorPydantic, MixinAuth):
         return await self.execute(
             handler_func,
             method=method,
+            use_primary=use_primary,
             request=request,
             **kwargs
         )
+
+    def build_pipeline(
+        self,
+        handler_func,
+        schema: Optional[Type[BaseModel]] = None,
+        method: str = "GET",
+        protected: bool = False,
+        required_permissions: Optional[List[str]] = None,
+        required_roles: Optional[List[str]] = None,
+        use_primary: bool = False,
+        route: Optional[str] = None,
+        etag: Optional[EtagSource] = None,
+        limit: Optional[ConcurrencyLimit] = None
+    ) -> Callable[[Request, Dict[str, Any]], Awaitable[Any]]:
+        """
+        Construye, una sola vez por ruta, el flujo especializado de
+        `handle_request`: roles/permisos como frozensets, sesión o
+        transacción según el método y despacho sync/async ya resueltos.
+        Las lecturas van a una réplica salvo que `use_primary` sea True.
+        Con métricas habilitadas y `route` definido, se devuelve la variante
+        instrumentada por etapa. Con `etag` (solo GET) el handler responde
+        304 si `If-None-Match` coincide con la versión actual. Con `limit`
+        el flujo completo pasa por el control de admisión de la ruta.
+        """
+        if limit is not None:
+            pipeline = self.build_pipeline(
+                handler_func, schema=schema, method=method, protected=protected,
+                required_permissions=required_permissions, required_roles=required_roles,
+                use_primary=use_primary, route=route, etag=etag
+            )
+            return self._with_limit(pipeline, concurrency_limiter(route or handler_func.__name__, limit), route)
+        if etag is not None and method.upper() == "GET":
+            handler_func = self._with_etag(handler_func, etag)
+        is_async = inspect.iscoroutinefunction(handler_func)
+        if method.upper() in WRITE_METHODS:
+            session_scope = in_transaction
+        else:
+            session_scope = lambda: simple_session(use_primary=use_primary)
+        roles = frozenset(required_roles) if required_roles else None
+        permissions = frozenset(required_permissions) if required_permissions else None
+        permission_mask = PermissionMask(permission_registry, permissions) if permissions else None
+
+        if request_metrics.enabled and route:
+            return self._build_measured_pipeline(
+                handler_func, is_async, session_scope, schema, protected,
+                roles, permissions, permission_mask, request_metrics.observer(route),
+                lambda status_code: request_metrics.count_status(route, status_code)
+            )
+
+        async def run(request: Request, kwargs: Dict[str, Any]):
+            try:
+                async with session_scope():
+                    if is_async:
+                        return await handler_func(request=request, **kwargs)
+                    return handler_func(request=request, **kwargs)
+            except Exception as e:
+                return self.exception_response(e)
+
+        if schema:
+            async def validated(request: Request, kwargs: Dict[str, Any]):
+                validation_result = await self.validate_body(request, schema)
+                if isinstance(validation_result, JSONResponse):
+                    return validation_result
+                return await run(request, kwargs)
+        else:
+            validated = run
+
+        if not protected:
+            return validated
+
+        async def pipeline(request: Request, kwargs: Dict[str, Any]):
+            auth_result = await self.authorize(request, roles, permissions, permission_mask)
+            if isinstance(auth_result, JSONResponse):
+                return auth_result
+            kwargs["user_auth"] = auth_result
+            return await validated(request, kwargs)
+
+        return pipeline
+
+    def _with_limit(self, pipeline, limiter: ConcurrencyLimiter, route: Optional[str] = None):
+        """
+        Envuelve el flujo: espera turno en la cola de la ruta o rechaza al
+        instante con `Retry-After`, sin tocar la base ni bcrypt. Con métricas,
+        la espera se registra como etapa `admission` y los rechazos cuentan
+        en el total y en los errores de la ruta con su código de estado.
+        """
+        limit = limiter.limit
+        observe = request_metrics.observer(route) if request_metrics.enabled and route else None
+
+        async def limited(request: Request, kwargs: Dict[str, Any]):
+            started = time.perf_counter()
+            rejected = await limiter.acquire()
+            if observe is not None:
+                waited = time.perf_counter() - started
+                observe("admission", waited)
+                if rejected is not None:
+                    observe("total", waited)
+                    request_metrics.count_status(route, limit.status_code)
+            if rejected is not None:
+                return self.shed_response(limit)
+            try:
+                return await pipeline(request, kwargs)
+            finally:
+                limiter.release()
+
+        return limited
+
+    def _with_etag(self, handler_func, etag_source: EtagSource):
+        """
+        Envuelve el handler: calcula la versión dentro de la sesión del
+        request (sin consultar filas si la fuente está en memoria) y, si el
+        cliente ya la tiene, devuelve 304 sin ejecutar el handler.
+        """
+        is_async = inspect.iscoroutinefunction(handler_func)
+
+        async def handler(request: Request, **kwargs):
+            version = await maybe_await(etag_source(request, **kwargs))
+            tag = f'"{version}"'
+            matched = matching_etag(request.headers.get("if-none-match"), tag)
+            if matched:
+                return self.not_modified(matched)
+            response = await handler_func(request=request, **kwargs) if is_async else handler_func(request=request, **kwargs)
+            if response.status_code == 200:
+                response.headers["ETag"] = tag
+                response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return handler
+
+    def _build_measured_pipeline(
+        self,
+        handler_func,
+        is_async: bool,
+        session_scope,
+        schema: Optional[Type[BaseModel]],
+        protected: bool,
+        roles: Optional[FrozenSet[str]],
+        permissions: Optional[FrozenSet[str]],
+        permission_mask: Optional[PermissionMask],
+        observe: Callable[[str, float], None],
+        count_status: Callable[[int], None]
+    ) -> Callable[[Request, Dict[str, Any]], Awaitable[Any]]:
+        """
+        Mismo flujo que `build_pipeline`, registrando la duración de cada etapa.
+        La serialización se mide dentro de `FastJSONResponse.render` y se
+        descuenta del tiempo del handler.
+        """
+        clock = time.perf_counter
+
+        async def stages(request: Request, kwargs: Dict[str, Any], render: List[float]):
+            if protected:
+                started = clock()
+                auth_result = await self.validate_auth(request)
+                authenticated = clock()
+                observe("authenticate", authenticated - started)
+                if isinstance(auth_result, JSONResponse):
+                    return auth_result
+                auth_result = await self.check_access(auth_result, roles, permissions, permission_mask)
+                observe("authorize", clock() - authenticated)
+                if isinstance(auth_result, JSONResponse):
+                    return auth_result
+                kwargs["user_auth"] = auth_result
+
+            if schema:
+                started = clock()
+                validation_result = await self.validate_body(request, schema)
+                observe("validate", clock() - started)
+                if isinstance(validation_result, JSONResponse):
+                    return validation_result
+
+            started = clock()
+            handler_seconds = 0.0
+            try:
+                async with session_scope():
+                    handler_started = clock()
+                    rendered_before = render[0]
+                    try:
+                        if is_async:
+                            return await handler_func(request=request, **kwargs)
+                        return handler_func(request=request, **kwargs)
+                    finally:
+                        handler_seconds = clock() - handler_started
+                        observe("handler", handler_seconds - (render[0] - rendered_before))
+            except Exception as e:
+                return self.exception_response(e)
+            finally:
+                observe("session", clock() - started - handler_seconds)
+
+        async def pipeline(request: Request, kwargs: Dict[str, Any]):
+            started = clock()
+            token = start_render_timer()
+            status_code = 500
+            try:
+                response = await stages(request, kwargs, render_timer())
+                status_code = response.status_code
+                return response
+            finally:
+                observe("serialize", render_timer()[0])
+                stop_render_timer(token)
+                observe("total", clock() - started)
+                count_status(status_code)
+
+        return pipeline
     
 
 class ValidadorRutasInteligentes(APIRouter):
@@ -220,25 +539,45 @@ class ValidadorRutasInteligentes(APIRouter):
         name: Optional[str] = None,
         protected: bool = False,
         required_roles: Optional[List[str]] = None,
-        required_permissions: Optional[List[str]] = None
+        required_permissions: Optional[List[str]] = None,
+        use_primary: bool = False,
+        etag: Optional[EtagSource] = None,
+        limit: Optional[ConcurrencyLimit] = None,
+        vary: Optional[str] = None
     ):
-        async def endpoint(request: Request):           
-            path_params = dict(request.path_params)
-            query_params = dict(request.query_params)
-            kwargs = {**path_params, **query_params}
-
-            func = getattr(handler_instance, handler_method)
-
-            return await handler_instance.handle_request(
-                request=request,
-                handler_func=func,
-                schema=schema,
-                method=method,
-                protected=protected,
-                required_roles=required_roles,
-                required_permissions=required_permissions,
-                **kwargs
-            )
+        """
+        Registra la ruta con el flujo de `build_pipeline`. Con `vary` (p. ej.
+        "Accept" si el handler negocia el formato) todas sus respuestas,
+        304 incluidos, declaran de qué cabeceras depende la representación.
+        """
+        pipeline = handler_instance.build_pipeline(
+            getattr(handler_instance, handler_method),
+            schema=schema,
+            method=method,
+            protected=protected,
+            required_roles=required_roles,
+            required_permissions=required_permissions,
+            use_primary=use_primary,
+            route=f"{method.upper()} {self.prefix}{path}",
+            etag=etag,
+            limit=limit
+        )
+        if vary is not None:
+            route_pipeline = pipeline
+
+            async def pipeline(request: Request, params: Dict[str, Any]):
+                response = await route_pipeline(request, params)
+                if isinstance(response, Response):
+                    add_vary(response, vary)
+                return response
+
+        if settings.RESPONSE_COMPRESSION:
+            async def endpoint(request: Request):
+                response = await pipeline(request, {**request.path_params, **request.query_params})
+                return await compress_response(response, request.headers.get("accept-encoding"))
+        else:
+            async def endpoint(request: Request):
+                return await pipeline(request, {**request.path_params, **request.query_params})
 
         self.add_api_route(
             path,
@@ -249,7 +588,19 @@ class ValidadorRutasInteligentes(APIRouter):
 
         
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(password_hasher.rounds)).decode("utf-8")
 
 def check_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
\ No newline at end of file
+    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def hash_passwords_async(passwords: List[str], limiter: Optional[ConcurrencyLimiter] = None) -> List[str]:
+    return await password_hasher.hash_many(passwords, limiter)
+
+async def check_password_async(password: str, hashed_password: str) -> bool:
+    return await password_hasher.check(password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return password_hasher.needs_rehash(hashed_password)
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Cache LRU en memoria con límite de tamaño y expiración por entrada.
+    - `max_size <= 0` o `ttl_seconds <= 0` deshabilita la caché.
+    - `on_evict(key, value)` se invoca cada vez que una entrada sale de la caché.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._on_evict = on_evict
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                self._evicted(key, value)
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> Any:
+        if not self.enabled:
+            return value
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return value
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._evicted(key, previous[1])
+            self._data[key] = (self._clock() + ttl, value)
+            while len(self._data) > self.max_size:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                self.evictions += 1
+                self._evicted(old_key, old_value)
+        return value
+
+    def pop(self, key: Hashable) -> bool:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return False
+            self.invalidations += 1
+            self._evicted(key, item[1])
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            items = list(self._data.items())
+            self._data.clear()
+            self.invalidations += len(items)
+            for key, (_, value) in items:
+                self._evicted(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _evicted(self, key: Hashable, value: Any) -> None:
+        if self._on_evict:
+            self._on_evict(key, value)
@@ -0,0 +1,143 @@
+import asyncio
+import gzip
+import zlib
+from typing import Callable, Dict, Hashable, Optional
+
+from starlette.responses import Response
+
+from .cache import TTLCache
+from .config import settings
+
+# Cuerpos más grandes que esto se comprimen fuera del event loop
+OFFLOAD_SIZE = 256 * 1024
+
+
+def _codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    """
+    Codecs disponibles en el entorno, en orden de preferencia del servidor.
+    """
+    codecs: Dict[str, Callable[[bytes], bytes]] = {}
+    try:
+        import brotli
+        codecs["br"] = lambda body: brotli.compress(body, quality=5)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        codecs["zstd"] = zstandard.ZstdCompressor(level=3).compress
+    except ImportError:
+        pass
+    level = settings.COMPRESSION_LEVEL
+    codecs["gzip"] = lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+    codecs["deflate"] = lambda body: zlib.compress(body, level)
+    return codecs
+
+
+CODECS = _codecs()
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Codec a usar según `Accept-Encoding` (valores q incluidos), o None.
+    """
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for codec in CODECS:
+        q = accepted.get(codec, wildcard)
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+IDENTITY = "identity"
+
+
+class ResponseBodyCache:
+    """
+    Cuerpos ya serializados (`identity`) y comprimidos por (clave, codec).
+    La clave la define el handler e incluye la versión de los datos, así una
+    versión nueva nunca reutiliza bytes viejos; las entradas antiguas salen
+    por LRU.
+    """
+
+    def __init__(self, max_size: int):
+        self._cache = TTLCache(max_size, float("inf"))
+
+    def get(self, key: Hashable, codec: str) -> Optional[bytes]:
+        return self._cache.get((key, codec))
+
+    def set(self, key: Hashable, codec: str, body: bytes) -> None:
+        self._cache.set((key, codec), body)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+response_body_cache = ResponseBodyCache(settings.RESPONSE_CACHE_MAX_SIZE)
+
+
+def add_vary(response: Response, field: str) -> None:
+    """
+    Añade `field` a la cabecera `Vary` conservando los valores que ya tenga.
+    """
+    current = response.headers.get("vary")
+    if not current:
+        response.headers["Vary"] = field
+    elif field.lower() not in {value.strip().lower() for value in current.split(",")}:
+        response.headers["Vary"] = f"{current}, {field}"
+
+
+async def compress_response(response: Response, accept_encoding: Optional[str]) -> Response:
+    """
+    Comprime el cuerpo si supera `COMPRESSION_MIN_SIZE` y el cliente acepta
+    algún codec. Las respuestas con `cache_key` reutilizan los bytes ya
+    comprimidos para esa versión. El ETag pasa a débil: la representación
+    comprimida no es idéntica byte a byte. Los 304 llevan `Vary:
+    Accept-Encoding` igual que el 200 que validan, para que una caché
+    compartida no mezcle las variantes.
+    """
+    if response.status_code == 304:
+        add_vary(response, "Accept-Encoding")
+        return response
+    body = getattr(response, "body", None)
+    if (
+        not body
+        or len(body) < settings.COMPRESSION_MIN_SIZE
+        or "content-encoding" in response.headers
+        or not 200 <= response.status_code < 300
+    ):
+        return response
+    add_vary(response, "Accept-Encoding")
+    codec = negotiate(accept_encoding)
+    if codec is None:
+        return response
+
+    cache_key = getattr(response, "cache_key", None)
+    compressed = response_body_cache.get(cache_key, codec) if cache_key is not None else None
+    if compressed is None:
+        compress = CODECS[codec]
+        compressed = await asyncio.to_thread(compress, body) if len(body) > OFFLOAD_SIZE else compress(body)
+        if cache_key is not None:
+            response_body_cache.set(cache_key, codec, compressed)
+
+    response.body = compressed
+    response.headers["Content-Encoding"] = codec
+    response.headers["Content-Length"] = str(len(compressed))
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        response.headers["ETag"] = f"W/{etag}"
+    return response
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Callable, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _PerLoop(Generic[T]):
+    """
+    Una instancia de la primitiva por event loop: las de asyncio quedan
+    ligadas al loop que las usa, y un mismo objeto global puede atender
+    varios loops (workers con su propio loop, tests, benchmarks con `asyncio.run`).
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instances: Dict[asyncio.AbstractEventLoop, T] = {}
+
+    def get(self) -> T:
+        loop = asyncio.get_running_loop()
+        instance = self._instances.get(loop)
+        if instance is None:
+            self._instances = {l: i for l, i in self._instances.items() if not l.is_closed()}
+            instance = self._instances[loop] = self._factory()
+        return instance
+
+
+class LoopSemaphore(_PerLoop[asyncio.Semaphore]):
+    """
+    Semáforo de `value` plazas por event loop.
+    """
+
+    def __init__(self, value: int):
+        super().__init__(lambda: asyncio.Semaphore(value))
+        self.value = value
+
+
+class LoopLock(_PerLoop[asyncio.Lock]):
+    """
+    `asyncio.Lock` por event loop, para cachés globales que cargan bajo candado.
+    """
+
+    def __init__(self):
+        super().__init__(asyncio.Lock)
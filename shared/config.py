@@ -1,12 +1,73 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Modo asíncrono (AsyncEngine/AsyncSession). Requiere asyncpg o aiosqlite.
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Réplicas de lectura separadas por comas; los GET se reparten entre ellas
+    DATABASE_REPLICA_URLS: str = ""
+    # Pool de conexiones; DB_POOL_TIMEOUT bajo = fallar rápido con 503 al agotarse.
+    # En modo síncrono el checkout espera dentro del event loop: un valor alto
+    # congela todo el worker mientras el pool está agotado
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 2.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Aviso de N+1: misma forma de sentencia más de N veces en un request (0 = sin aviso)
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
     TIMEZONE: str
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Encoder de respuestas JSON: "auto" (orjson si está instalado), "orjson" o "stdlib"
+    JSON_ENCODER: str = "auto"
+    # Histogramas de latencia por ruta/etapa y endpoint Prometheus `/metrics`
+    METRICS_ENABLED: bool = False
+    # Compresión de respuestas según Accept-Encoding (gzip/deflate; br/zstd si están instalados)
+    RESPONSE_COMPRESSION: bool = False
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 6
+    # Cuerpos serializados/comprimidos cacheados por versión (catálogo de roles)
+    RESPONSE_CACHE_MAX_SIZE: int = 256
+
+    # Caché LRU de tokens ya verificados; cada entrada vence con el `exp` del token
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAX_SIZE: int = 10000
+    # Emite los permisos como bitmap compacto (`pbm`) en lugar de la lista `permisos`
+    JWT_PERMISSION_BITMAP: bool = False
+
+    # Pool de bcrypt: "thread" o "process"; 0 = valores por defecto (núcleos de CPU)
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_IN_FLIGHT: int = 0
+    # Costo bcrypt, igual en todos los workers; el login re-hashea los hashes con otro
+    # costo. 0 = calibrar al arrancar para que una verificación tarde ~BCRYPT_TARGET_MS
+    # en esta CPU: solo con un worker, porque cada proceso calibra por su cuenta
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: float = 250
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 15
+    # Control de admisión de las rutas con bcrypt (login, alta y edición de usuarios),
+    # un solo límite para todas: concurrencia (0 = 2 x PASSWORD_HASH_MAX_IN_FLIGHT, sin
+    # superar DB_POOL_SIZE + DB_MAX_OVERFLOW), cola acotada con plazo y
+    # rechazo rápido con Retry-After (503 o 429)
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 0
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_SHED_STATUS: int = 503
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Caché en proceso de roles/permisos efectivos por usuario (0 = deshabilitada)
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # Catálogo de roles/permisos en memoria; el TTL acota la demora entre workers (0 = sin caché)
+    ROLES_CATALOG_TTL_SECONDS: float = 60
 
     class Config:
         env_file = ".env"
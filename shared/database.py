@@ -1,36 +1,250 @@
+import inspect
+import logging
+import re
+from collections import Counter
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from itertools import cycle
+from typing import Any, Callable, Dict, List, Optional, Union
 from .config import settings
-from contextlib import asynccontextmanager
+from .db_pool import engine_stats, instrument, pool_options
+from contextlib import asynccontextmanager, contextmanager
 from contextvars import ContextVar
 
+logger = logging.getLogger(__name__)
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+def get_async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return _to_async_url(settings.DATABASE_URL)
+
+def get_replica_urls() -> List[str]:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+def _record_statement(statement: str, seconds: float) -> None:
+    # Lo invoca el listener de `instrument`: acumula en el QueryStats en curso, si lo hay
+    stats = _query_stats_var.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=False
+    echo=False,
+    **pool_options(settings.DATABASE_URL)
 )
+instrument(engine, "primary", on_statement=_record_statement)
+
+async_engine = create_async_engine(
+    get_async_database_url(),
+    echo=False,
+    **pool_options(get_async_database_url(), is_async=True)
+) if settings.DATABASE_ASYNC else None
+if async_engine is not None:
+    instrument(async_engine.sync_engine, "primary_async", on_statement=_record_statement)
+
+# Réplicas de lectura: mismo modo (sync/async) que el primario
+replica_engines = []
+for index, replica_url in enumerate(get_replica_urls()):
+    if settings.DATABASE_ASYNC:
+        replica_url = _to_async_url(replica_url)
+        replica = create_async_engine(replica_url, echo=False, **pool_options(replica_url, is_async=True))
+        instrument(replica.sync_engine, f"replica_{index}", on_statement=_record_statement)
+    else:
+        replica = create_engine(replica_url, echo=False, **pool_options(replica_url))
+        instrument(replica, f"replica_{index}", on_statement=_record_statement)
+    replica_engines.append(replica)
+_replica_cycle = cycle(replica_engines) if replica_engines else None
+
+# Listas de parámetros expandidas (`IN (?, ?, ?)`) y espacios no cambian la forma
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_LIST.sub("(?)", statement)).strip()
+
+class QueryStats:
+    """
+    Sentencias SQL ejecutadas en un request (o bloque `track_queries`):
+    total, tiempo en base de datos y repeticiones por forma de sentencia.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """
+        Formas de sentencia ejecutadas más de `threshold` veces (posible N+1).
+        """
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+_query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _query_stats_var.get()
 
-_session_var: ContextVar[Session] = ContextVar("session")
+@contextmanager
+def track_queries():
+    """
+    Cuenta las sentencias ejecutadas dentro del bloque; pensado para fijar
+    presupuestos de consultas en tests:
 
-def get_session() -> Session:
+        with track_queries() as stats:
+            await client.get("/roles/")
+        assert stats.count <= 2
+    """
+    stats = QueryStats()
+    token = _query_stats_var.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats_var.reset(token)
+
+_session_var: ContextVar[Union[Session, AsyncSession, "LazySession"]] = ContextVar("session")
+
+def get_session() -> Union[Session, AsyncSession, "LazySession"]:
     return _session_var.get()
 
-@asynccontextmanager
-async def in_transaction():
-    with Session(engine) as session:
-        token = _session_var.set(session)
-        try:
-            yield session
-            session.commit()
-        except Exception:
-            session.rollback()
-            raise
-        finally:
-            _session_var.reset(token)
+_after_commit_var: ContextVar[Optional[List[Callable[[], None]]]] = ContextVar("after_commit", default=None)
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """
+    Ejecuta `callback` cuando la transacción en curso confirme (no se
+    ejecuta si hace rollback). Fuera de una transacción se ejecuta ya.
+    Útil para invalidar cachés en memoria sin que una lectura concurrente
+    vuelva a cargar datos aún no confirmados.
+    """
+    callbacks = _after_commit_var.get()
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+async def maybe_await(result: Any) -> Any:
+    """
+    Permite que repositorios y consultas funcionen igual con `Session`
+    y con `AsyncSession`: espera el resultado solo si es awaitable.
+    """
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+def get_engine_stats() -> Dict[str, Any]:
+    """
+    Estado por engine (primario y réplicas): conexiones en uso, overflow,
+    histogramas de espera por checkout y de latencia de sentencias, timeouts.
+    """
+    stats = {"primary": engine_stats(engine)}
+    if async_engine is not None:
+        stats["primary_async"] = engine_stats(async_engine.sync_engine)
+    for index, replica in enumerate(replica_engines):
+        stats[f"replica_{index}"] = engine_stats(getattr(replica, "sync_engine", replica))
+    return stats
+
+async def dispose_engines() -> None:
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in replica_engines:
+        await maybe_await(replica.dispose())
+
+class LazySession:
+    """
+    Proxy de sesión que se guarda en el ContextVar del request: la `Session`
+    (o `AsyncSession`) real solo se crea en el primer uso, así los handlers
+    que responden antes de tocar la base no pagan por abrirla ni cerrarla.
+    """
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: Callable[[], Union[Session, AsyncSession]]):
+        self._factory = factory
+        self._session = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+def _session_factory(read_only: bool, bind: Any = None) -> Callable[[], Union[Session, AsyncSession]]:
+    if bind is None and read_only and _replica_cycle is not None:
+        bind = next(_replica_cycle)
+    if async_engine is not None:
+        return lambda: AsyncSession(bind or async_engine, expire_on_commit=False)
+    return lambda: Session(bind or engine)
+
+def _warn_repeated(stats: QueryStats) -> None:
+    threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+    if threshold <= 0:
+        return
+    for shape, times in stats.repeated(threshold).items():
+        logger.warning("Posible N+1: la misma sentencia se ejecutó %d veces en un request: %s", times, shape)
 
 @asynccontextmanager
-async def simple_session():
-    with Session(engine) as session:
-        token = _session_var.set(session)
-        try:
-            yield session
-        finally:
-            _session_var.reset(token)
+async def _session_scope(transactional: bool, read_only: bool = False, bind: Any = None):
+    session = LazySession(_session_factory(read_only, bind))
+    token = _session_var.set(session)
+    # Un request = un scope; si ya hay un `track_queries` activo (tests), se acumula ahí
+    stats_token = _query_stats_var.set(QueryStats()) if _query_stats_var.get() is None else None
+    callbacks: List[Callable[[], None]] = []
+    callbacks_token = _after_commit_var.set(callbacks) if transactional else None
+    try:
+        yield session
+        if transactional and session.opened:
+            await maybe_await(session.commit())
+        if callbacks_token is not None:
+            _after_commit_var.reset(callbacks_token)
+            callbacks_token = None
+            for callback in callbacks:
+                callback()
+    except Exception:
+        if transactional and session.opened:
+            await maybe_await(session.rollback())
+        raise
+    finally:
+        _session_var.reset(token)
+        if callbacks_token is not None:
+            _after_commit_var.reset(callbacks_token)
+        if session.opened:
+            await maybe_await(session.close())
+        if stats_token is not None:
+            _warn_repeated(_query_stats_var.get())
+            _query_stats_var.reset(stats_token)
+
+def in_transaction():
+    """
+    Sesión transaccional para escrituras (commit al salir, rollback si falla).
+    La conexión se retiene desde la primera consulta hasta el commit: no
+    esperar trabajo lento (bcrypt, I/O externo) con una transacción abierta;
+    en modo síncrono, un pool agotado bloquea el event loop en el checkout.
+    """
+    return _session_scope(transactional=True)
+
+def simple_session(use_primary: bool = False, bind: Any = None):
+    """
+    Sesión sin transacción para lecturas. Si hay réplicas configuradas usa
+    una de ellas (round-robin), salvo que `use_primary` fuerce el primario
+    (p. ej. lecturas que deben ver la escritura recién hecha). Con `bind`
+    usa ese engine (p. ej. el de la sesión del request que leyó la versión).
+    """
+    return _session_scope(transactional=False, read_only=not use_primary, bind=bind)
@@ -0,0 +1,156 @@
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import settings
+from .metrics import Histogram, format_histogram
+
+
+class EngineMetrics:
+    """
+    Métricas de un engine: espera por checkout del pool, timeouts y
+    latencia de las sentencias ejecutadas.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkout_wait = Histogram()
+        self.query_latency = Histogram()
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"query_latency_seconds": self.query_latency.snapshot()}
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            })
+        return stats
+
+
+_engine_metrics: "weakref.WeakKeyDictionary[Any, EngineMetrics]" = weakref.WeakKeyDictionary()
+
+
+class _InstrumentedPoolMixin:
+    metrics: Optional[EngineMetrics] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.checkout_wait.observe(time.perf_counter() - start)
+        if self.metrics:
+            self.metrics.checkouts += 1
+        return connection
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: las métricas sobreviven
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Argumentos de pool para create_engine/create_async_engine según `Settings`.
+    SQLite en memoria usa su propio pool de un solo hilo y no se configura.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def instrument(engine, name: str, on_statement: Optional[Callable[[str, float], None]] = None) -> EngineMetrics:
+    """
+    Asocia métricas al engine (síncrono; para async usar `.sync_engine`).
+    Un único par de listeners mide cada sentencia; `on_statement(statement,
+    seconds)` recibe la misma medición (conteo por request de `track_queries`).
+    """
+    metrics = EngineMetrics(name)
+    _engine_metrics[engine] = metrics
+    if isinstance(engine.pool, _InstrumentedPoolMixin):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+        metrics.query_latency.observe(seconds)
+        if on_statement is not None:
+            on_statement(statement, seconds)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Una sentencia fallida no llega a after_cursor_execute: descartar su inicio
+        starts = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    return metrics
+
+
+def render_engine_metrics() -> List[str]:
+    """
+    Exposición Prometheus de las métricas de todos los engines instrumentados.
+    """
+    metrics = sorted(_engine_metrics.values(), key=lambda m: m.name)
+    lines = [
+        "# HELP db_query_seconds Latencia de sentencias SQL por engine.",
+        "# TYPE db_query_seconds histogram",
+    ]
+    for m in metrics:
+        lines += format_histogram("db_query_seconds", {"engine": m.name}, m.query_latency)
+    lines += [
+        "# HELP db_pool_checkout_wait_seconds Espera por una conexión del pool.",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+    ]
+    for m in metrics:
+        lines += format_histogram("db_pool_checkout_wait_seconds", {"engine": m.name}, m.checkout_wait)
+    lines += [
+        "# HELP db_pool_timeouts_total Checkouts que agotaron DB_POOL_TIMEOUT.",
+        "# TYPE db_pool_timeouts_total counter",
+    ]
+    lines += [f'db_pool_timeouts_total{{engine="{m.name}"}} {m.timeouts}' for m in metrics]
+    return lines
+
+
+def engine_stats(engine) -> Optional[Dict[str, Any]]:
+    metrics = _engine_metrics.get(engine)
+    if metrics is None:
+        return None
+    return metrics.snapshot(engine.pool)
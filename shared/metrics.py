@@ -0,0 +1,146 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import settings
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Histograma de latencias con buckets fijos (segundos), al estilo Prometheus.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """
+        Pares (límite superior, conteo acumulado), terminando en +Inf.
+        """
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "buckets": {("+Inf" if bound == float("inf") else bound): count for bound, count in self.cumulative()},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_histogram(name: str, labels: Dict[str, str], histogram: Histogram) -> List[str]:
+    """
+    Líneas de exposición Prometheus (`_bucket`, `_sum`, `_count`) de un histograma.
+    """
+    lines = [
+        f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {count}"
+        for bound, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+    return lines
+
+
+class RequestMetrics:
+    """
+    Latencia por ruta y etapa del pipeline (espera de admisión, autenticación,
+    autorización, validación, sesión, handler, serialización y total) y conteo
+    de errores por código de estado, incluidos los rechazos del control de
+    admisión. Deshabilitado, las rutas se construyen sin instrumentación.
+    """
+
+    STAGES = ("admission", "authenticate", "authorize", "validate", "session", "handler", "serialize", "total")
+
+    def __init__(self, enabled: bool = False, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._stages: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def observer(self, route: str) -> Callable[[str, float], None]:
+        """
+        Función `observe(stage, seconds)` con los histogramas de la ruta ya creados.
+        """
+        with self._lock:
+            histograms = {
+                stage: self._stages.setdefault((route, stage), Histogram(self.buckets))
+                for stage in self.STAGES
+            }
+        return lambda stage, seconds: histograms[stage].observe(seconds)
+
+    def count_status(self, route: str, status_code: int) -> None:
+        if status_code < 400:
+            return
+        key = (route, status_code)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP http_request_stage_seconds Latencia por ruta y etapa del pipeline.",
+            "# TYPE http_request_stage_seconds histogram",
+        ]
+        for (route, stage), histogram in sorted(self._stages.items()):
+            if histogram.count:
+                lines += format_histogram("http_request_stage_seconds", {"route": route, "stage": stage}, histogram)
+        lines += [
+            "# HELP http_request_errors_total Respuestas de error por ruta y código de estado.",
+            "# TYPE http_request_errors_total counter",
+        ]
+        for (route, status_code), count in sorted(self._errors.items()):
+            lines.append(f"http_request_errors_total{_labels({'route': route, 'status': str(status_code)})} {count}")
+        return lines
+
+
+request_metrics = RequestMetrics(enabled=settings.METRICS_ENABLED)
+
+
+# Tiempo de serialización del request en curso: lista de un elemento
+# acumulada por `FastJSONResponse.render` (None = sin medición)
+_render_seconds: ContextVar[Optional[List[float]]] = ContextVar("render_seconds", default=None)
+
+
+def start_render_timer() -> Token:
+    return _render_seconds.set([0.0])
+
+
+def render_timer() -> Optional[List[float]]:
+    return _render_seconds.get()
+
+
+def stop_render_timer(token: Token) -> None:
+    _render_seconds.reset(token)
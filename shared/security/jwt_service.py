@@ -1,10 +1,19 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import jwt, JWTError
+from ..cache import TTLCache
 from ..config import settings
 from ..utils import get_hora_peru
 
 class JWTService:
+    # Payloads verificados indexados por sha256 del token
+    token_cache = TTLCache(
+        max_size=settings.JWT_CACHE_MAX_SIZE if settings.JWT_CACHE_ENABLED else 0,
+        ttl_seconds=float("inf"),
+    )
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
@@ -33,8 +42,28 @@ class JWTService:
 
     @staticmethod
     def validate_token(token: str, expected_type: str = "access") -> Optional[Dict[str, Any]]:
-        payload = JWTService.decode_token(token)
+        payload = JWTService._decode_cached(token)
         if payload and payload.get("type") == expected_type:
             # La expiración es validada automáticamente por jwt.decode
             return payload
         return None
+
+    @staticmethod
+    def _decode_cached(token: str) -> Optional[Dict[str, Any]]:
+        cache = JWTService.token_cache
+        if not cache.enabled:
+            return JWTService.decode_token(token)
+
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = cache.get(key)
+        if payload is None:
+            payload = JWTService.decode_token(token)
+            if not payload or "exp" not in payload:
+                return payload
+            # Solo se cachean tokens válidos y hasta su propio `exp`
+            cache.set(key, payload, ttl_seconds=payload["exp"] - time.time())
+        return dict(payload)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        return JWTService.token_cache.stats()
@@ -0,0 +1,196 @@
+import asyncio
+import math
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import bcrypt
+
+from ..concurrency import LoopSemaphore
+from ..config import settings
+
+if TYPE_CHECKING:
+    from ..admission import ConcurrencyLimiter
+
+
+# Costo de `bcrypt.gensalt()` mientras no haya calibración ni BCRYPT_ROUNDS
+DEFAULT_ROUNDS = 12
+# Costo con el que se mide la CPU al calibrar (rápido; cada punto más duplica el trabajo)
+PROBE_ROUNDS = 8
+
+
+def _hashpw(password: str, rounds: int = DEFAULT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _checkpw(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """
+    Costo de un hash bcrypt (`$2b$12$...`), o None si no tiene ese formato.
+    """
+    parts = hashed_password.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_rounds(target_seconds: float, min_rounds: int, max_rounds: int, samples: int = 5) -> int:
+    """
+    Mayor costo cuya verificación estimada no supera `target_seconds` en
+    esta CPU, dentro de [min_rounds, max_rounds]. Mide `checkpw` con
+    PROBE_ROUNDS (mediana de `samples`) y extrapola: t(r) = t(probe) * 2^(r - probe).
+    """
+    hashed = _hashpw("calibration", PROBE_ROUNDS)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        _checkpw("calibration", hashed)
+        timings.append(time.perf_counter() - started)
+    probe_seconds = statistics.median(timings)
+    rounds = PROBE_ROUNDS + math.floor(math.log2(target_seconds / probe_seconds))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt fuera del event loop en un pool acotado.
+    - `executor`: "thread" (bcrypt libera el GIL) o "process".
+    - `max_in_flight`: trabajos enviados al pool a la vez; el resto espera
+      en cola y se reporta como `queue_depth`.
+    - `rounds`: costo de los hashes nuevos; 0 = DEFAULT_ROUNDS hasta que
+      `calibrate()` lo ajuste a la CPU.
+    """
+
+    def __init__(self, executor: str = "thread", workers: int = 0, max_in_flight: int = 0, rounds: int = 0):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Executor de hashing no soportado: {executor}")
+        self.executor_type = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers
+        self.rounds = rounds or DEFAULT_ROUNDS
+        self.calibrated_seconds: Optional[float] = None
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._semaphore = LoopSemaphore(self.max_in_flight)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hashpw, password, self.rounds)
+
+    async def check(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(_checkpw, password, hashed_password)
+
+    async def hash_many(self, passwords: List[str], limiter: Optional["ConcurrencyLimiter"] = None) -> List[str]:
+        """
+        Hashea un lote usando todos los workers, en tandas de `max_in_flight`:
+        el lote completo nunca queda encolado delante de los logins que
+        lleguen mientras tanto. Con `limiter`, cada contraseña pide su turno
+        como un login: el lote pesa en la admisión lo que hashea, y un rechazo
+        corta el lote con `AdmissionRejected`.
+        """
+        hash_one = self.hash if limiter is None else lambda password: limiter.run(self.hash, password)
+        hashes: List[str] = []
+        for start in range(0, len(passwords), self.max_in_flight):
+            batch = passwords[start:start + self.max_in_flight]
+            # Toda la tanda termina antes de propagar un error: nada sigue hasheando tras la respuesta
+            results = await asyncio.gather(*(hash_one(password) for password in batch), return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            hashes += results
+        return hashes
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        True si el hash guardado no usa el costo vigente (más bajo o más alto).
+        """
+        return hash_rounds(hashed_password) != self.rounds
+
+    async def calibrate(self, target_seconds: float, min_rounds: int, max_rounds: int) -> int:
+        """
+        Ajusta `rounds` al costo que cumple `target_seconds` por verificación,
+        midiendo en el mismo pool que atiende los requests.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.rounds = await loop.run_in_executor(
+            self._get_executor(), calibrate_rounds, target_seconds, min_rounds, max_rounds
+        )
+        self.calibrated_seconds = time.perf_counter() - started
+        return self.rounds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_type,
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "wait_seconds_total": self.wait_seconds_total,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.executor_type == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _submit(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore.get()
+        queued_at = time.perf_counter()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        started_at = time.perf_counter()
+        self.wait_seconds_total += started_at - queued_at
+        self.in_flight += 1
+        try:
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.run_seconds_total += time.perf_counter() - started_at
+            semaphore.release()
+
+
+password_hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_in_flight=settings.PASSWORD_HASH_MAX_IN_FLIGHT,
+    rounds=settings.BCRYPT_ROUNDS,
+)
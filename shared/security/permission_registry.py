@@ -0,0 +1,118 @@
+import base64
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from ..concurrency import LoopLock
+
+# Versión del formato del claim `pbm`: bit = id del permiso, little-endian, base64url
+BITMAP_CLAIM = "pbm"
+BITMAP_VERSION_CLAIM = "pbv"
+BITMAP_VERSION = 1
+
+PermissionLoader = Callable[[], Awaitable[Iterable[Tuple[str, int]]]]
+
+
+def encode_bitmap(permission_ids: Iterable[int]) -> str:
+    bits = 0
+    for permission_id in permission_ids:
+        bits |= 1 << permission_id
+    raw = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_bitmap(claim: str) -> int:
+    raw = base64.urlsafe_b64decode(claim + "=" * (-len(claim) % 4))
+    return int.from_bytes(raw, "little")
+
+
+class PermissionRegistry:
+    """
+    Registro en proceso nombre de permiso -> posición de bit (id del permiso).
+    - `version` aumenta con cada cambio, para invalidar las máscaras por ruta.
+    - El loader lo provee la aplicación; se usa al encontrar nombres
+      desconocidos, como máximo una vez cada `refresh_interval` segundos.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.version = 0
+        self.refresh_interval = refresh_interval
+        self._bits: Dict[str, int] = {}
+        self._loader: Optional[PermissionLoader] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = LoopLock()
+
+    def set_loader(self, loader: PermissionLoader) -> None:
+        self._loader = loader
+
+    def load(self, permissions: Iterable[Tuple[str, int]]) -> None:
+        bits = {name: permission_id for name, permission_id in permissions}
+        self._loaded_at = time.monotonic()
+        if bits != self._bits:
+            self._bits = bits
+            self.version += 1
+
+    def can_refresh(self) -> bool:
+        return self._loader is not None and (
+            self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+        )
+
+    def register(self, name: str, permission_id: int) -> None:
+        if self._bits.get(name) != permission_id:
+            self._bits[name] = permission_id
+            self.version += 1
+
+    def bit(self, name: str) -> Optional[int]:
+        return self._bits.get(name)
+
+    def names(self, bitmap: int) -> List[str]:
+        return [name for name, bit in self._bits.items() if bitmap >> bit & 1]
+
+    async def refresh(self) -> None:
+        async with self._lock.get():
+            if self.can_refresh():
+                self.load(await self._loader())
+
+    async def mask(self, names: FrozenSet[str]) -> Optional[int]:
+        """
+        Máscara de bits de `names`, o None si alguno no existe ni tras recargar.
+        """
+        if any(name not in self._bits for name in names) and self.can_refresh():
+            await self.refresh()
+        mask = 0
+        for name in names:
+            bit = self._bits.get(name)
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+
+class PermissionMask:
+    """
+    Máscara precalculada de una ruta; se recalcula solo si cambia el registro.
+    """
+
+    def __init__(self, registry: PermissionRegistry, names: FrozenSet[str]):
+        self.registry = registry
+        self.names = names
+        self._version = -1
+        self._mask: Optional[int] = None
+        self._full_access: Optional[int] = None
+
+    async def resolve(self, full_access_name: str) -> Tuple[Optional[int], Optional[int]]:
+        stale = self._mask is None and self.registry.can_refresh()
+        if self._version != self.registry.version or stale:
+            self._mask = await self.registry.mask(self.names)
+            full_access = self.registry.bit(full_access_name)
+            self._full_access = None if full_access is None else 1 << full_access
+            self._version = self.registry.version
+        return self._mask, self._full_access
+
+    async def allows(self, bitmap: int, full_access_name: str) -> bool:
+        mask, full_access = await self.resolve(full_access_name)
+        if full_access is not None and bitmap & full_access:
+            return True
+        return mask is not None and bitmap & mask == mask
+
+
+permission_registry = PermissionRegistry()
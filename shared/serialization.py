@@ -0,0 +1,98 @@
+import dataclasses
+import json
+import time as _time
+from datetime import date, datetime, time
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel as PydanticModel
+from starlette.responses import JSONResponse
+
+from .config import settings
+from .metrics import render_timer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+JSONDumps = Callable[[Any], bytes]
+
+
+def _default(obj: Any) -> Any:
+    """
+    Tipos que ninguno de los dos encoders serializa por sí mismo.
+    """
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, PydanticModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def stdlib_dumps(obj: Any) -> bytes:
+    # Mismo formato que `JSONResponse` de Starlette
+    return json.dumps(
+        obj,
+        default=_stdlib_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def orjson_dumps(obj: Any) -> bytes:
+    # orjson serializa dataclasses y datetimes de forma nativa, sin dicts intermedios
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _resolve(name: str) -> JSONDumps:
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return stdlib_dumps
+    if orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson requiere `pip install orjson`.")
+    return orjson_dumps
+
+
+json_dumps: JSONDumps = _resolve(settings.JSON_ENCODER)
+
+
+def set_json_dumps(dumps: Optional[JSONDumps]) -> None:
+    """
+    Reemplaza el encoder usado por `FastJSONResponse` (None = el configurado).
+    """
+    global json_dumps
+    json_dumps = dumps or _resolve(settings.JSON_ENCODER)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    `JSONResponse` que serializa con el encoder rápido (orjson si está
+    disponible). Acepta DTOs dataclass y datetimes directamente.
+    """
+
+    def render(self, content: Any) -> bytes:
+        timer = render_timer()
+        if timer is None:
+            return json_dumps(content)
+        start = _time.perf_counter()
+        body = json_dumps(content)
+        timer[0] += _time.perf_counter() - start
+        return body
+
+
+class RenderedJSONResponse(FastJSONResponse):
+    """
+    Respuesta con el cuerpo JSON ya serializado (p. ej. tomado de caché).
+    """
+
+    def render(self, content: bytes) -> bytes:
+        return content
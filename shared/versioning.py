@@ -0,0 +1,63 @@
+from typing import List, Union
+
+from sqlalchemy import event, func, insert, select, update
+from sqlmodel import Field, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .database import maybe_await
+
+# Nombres de las versiones declaradas: `create_all` siembra sus filas
+_names: List[str] = []
+
+
+class DataVersionModel(SQLModel, table=True):
+    __tablename__ = "data_versions"
+
+    name: str = Field(primary_key=True, max_length=50)
+    version: int = Field(default=0, nullable=False)
+
+
+@event.listens_for(DataVersionModel.__table__, "after_create")
+def _seed_versions(target, connection, **kwargs) -> None:
+    if _names:
+        connection.execute(insert(target), [{"name": name, "version": 0} for name in _names])
+
+
+class DataVersion:
+    """
+    Versión de un conjunto de datos guardada en la base (fila `name` de
+    `data_versions`), para ETags y claims.
+    - Todos los workers leen el mismo valor y solo cambia con una escritura.
+    - `current()` se lee en la sesión del request: en una réplica, la versión
+      llega con los mismos datos que el cuerpo (nunca es más nueva que ellos).
+    - `bump()` la incrementa en la transacción de la sesión; se confirma con
+      el commit del request.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        _names.append(name)
+
+    def column(self):
+        """
+        Subconsulta escalar con la versión, para leerla en otra consulta.
+        """
+        return (
+            select(func.coalesce(func.max(DataVersionModel.version), 0))
+            .where(DataVersionModel.name == self.name)
+            .scalar_subquery()
+        )
+
+    async def current(self, session: Union[Session, AsyncSession]) -> int:
+        return (await maybe_await(session.exec(select(self.column())))).scalar_one()
+
+    async def bump(self, session: Union[Session, AsyncSession]) -> None:
+        stmt = (
+            update(DataVersionModel)
+            .where(DataVersionModel.name == self.name)
+            .values(version=DataVersionModel.version + 1)
+        )
+        result = await maybe_await(session.exec(stmt))
+        if result.rowcount == 0:
+            # Base sin la fila sembrada (p. ej. migración pendiente)
+            await maybe_await(session.exec(insert(DataVersionModel).values(name=self.name, version=1)))